@@ -1,12 +1,15 @@
 import os
-import asyncio
 from openai import AsyncAzureOpenAI
 
 import chainlit as cl
 from uuid import uuid4
 from chainlit.logger import logger
+from chainlit.config import config
 
 from realtime import RealtimeClient
+from realtime.convert import AudioConverter, MODEL_SAMPLE_RATE
+from realtime.playback import AudioDownlink
+from realtime.pool import RealtimeConnectionPool
 from realtime.tools import tools, cosmos_db
 
 client = AsyncAzureOpenAI(api_key=os.environ["AZURE_OPENAI_API_KEY"],
@@ -14,20 +17,38 @@ client = AsyncAzureOpenAI(api_key=os.environ["AZURE_OPENAI_API_KEY"],
                           azure_deployment=os.environ["AZURE_OPENAI_DEPLOYMENT"],
                           api_version="2024-10-01-preview")    
 
+# Warm realtime connections shared by every session of this worker
+connection_pool = RealtimeConnectionPool()
+
 async def setup_openai_realtime(system_prompt: str):
     """Instantiate and configure the OpenAI Realtime Client"""
     openai_realtime = RealtimeClient(system_prompt = system_prompt)
     cl.user_session.set("track_id", str(uuid4()))
+    # The browser plays audio at the configured rate; the model always speaks at 24kHz
+    output_converter = None
+    if config.features.audio.sample_rate != MODEL_SAMPLE_RATE:
+        output_converter = AudioConverter(MODEL_SAMPLE_RATE, config.features.audio.sample_rate)
     
-    async def handle_conversation_updated(event):
+    async def send_audio_chunk(audio):
+        # socket.io only sends bytes as binary attachments
+        audio = output_converter.convert(audio) if output_converter else audio
+        await cl.context.emitter.send_audio_chunk(cl.OutputAudioChunk(mimeType="pcm16", data=audio, track=cl.user_session.get("track_id")))
+
+    # Coalesces and paces the assistant's audio; started here so its task runs in this session's context
+    downlink = AudioDownlink(send_audio_chunk, playback=openai_realtime.playback)
+    downlink.start()
+    cl.user_session.set("audio_downlink", downlink)
+
+    def handle_conversation_updated(event):
         item = event.get("item")
         delta = event.get("delta")
         """Currently used to stream audio back to the client."""
+        # Synchronous, so deltas and interrupts reach the downlink in the order they were received
         if delta:
             # Only one of the following will be populated for any given event
             if 'audio' in delta:
-                audio = delta['audio']  # Int16Array, audio added
-                await cl.context.emitter.send_audio_chunk(cl.OutputAudioChunk(mimeType="pcm16", data=audio, track=cl.user_session.get("track_id")))
+                audio = delta['audio']  # memoryview over PCM16, audio added
+                downlink.push(item.id, audio)
                 
             if 'arguments' in delta:
                 arguments = delta['arguments']  # string, function arguments added
@@ -61,13 +82,16 @@ async def setup_openai_realtime(system_prompt: str):
     
     openai_realtime.on('conversation.updated', handle_conversation_updated)
     openai_realtime.on('conversation.item.completed', handle_item_completed)
+    # Synchronous as well: unsent audio is dropped before the client measures what was played
+    openai_realtime.on('conversation.interrupted', lambda event: downlink.interrupt())
     openai_realtime.on('conversation.interrupted', handle_conversation_interrupt)
     openai_realtime.on('conversation.item.input_audio_transcription.completed', handle_input_audio_transcription_completed)
     openai_realtime.on('error', handle_error)
 
     cl.user_session.set("openai_realtime", openai_realtime)
-    coros = [openai_realtime.add_tool(tool_def, tool_handler) for tool_def, tool_handler in tools]
-    await asyncio.gather(*coros)
+    await openai_realtime.add_tools(tools)
+    # Warm connections get this session's config, so attaching one needs no session.update round trip
+    connection_pool.configure(openai_realtime.session_payload())
     
 
 system_prompt = """You are an internal agent for MSC. You help employees do their jobs by leveraging tools to answer questions and provide information.
@@ -136,6 +160,7 @@ async def start():
         content="Hi, how can I help you?. Press `P` to talk!"
     ).send()
     await setup_openai_realtime(system_prompt=system_prompt + "\n\n Customer ID: 12121")
+    connection_pool.start()
 
 @cl.on_message
 async def on_message(message: cl.Message):
@@ -149,10 +174,10 @@ async def on_message(message: cl.Message):
 async def on_audio_start():
     try:
         openai_realtime: RealtimeClient = cl.user_session.get("openai_realtime")
-        # TODO: might want to recreate items to restore context
-        # openai_realtime.create_conversation_item(item)
-        await openai_realtime.connect()
-        logger.info("Connected to OpenAI realtime")
+        # Replays the previous conversation if the last connection was closed
+        await connection_pool.attach(openai_realtime)
+        cl.user_session.get("audio_downlink").start()
+        logger.info(f"Connected to OpenAI realtime {connection_pool.metrics()}")
         return True
     except Exception as e:
         await cl.ErrorMessage(content=f"Failed to connect to OpenAI realtime: {e}").send()
@@ -168,9 +193,20 @@ async def on_audio_chunk(chunk: cl.InputAudioChunk):
             logger.info("RealtimeClient is not connected")
 
 @cl.on_audio_end
+async def on_audio_end():
+    # Keep the connection for the next push-to-talk turn; the pool closes it once idle
+    openai_realtime: RealtimeClient = cl.user_session.get("openai_realtime")
+    if openai_realtime:
+        if openai_realtime.is_connected():
+            await openai_realtime.realtime.flush_input_audio()
+        connection_pool.release(openai_realtime)
+
 @cl.on_chat_end
 @cl.on_stop
 async def on_end():
+    downlink: AudioDownlink = cl.user_session.get("audio_downlink")
+    if downlink:
+        downlink.close()
     openai_realtime: RealtimeClient = cl.user_session.get("openai_realtime")
-    if openai_realtime and openai_realtime.is_connected():
-        await openai_realtime.disconnect()
\ No newline at end of file
+    if openai_realtime:
+        await connection_pool.detach(openai_realtime)
\ No newline at end of file
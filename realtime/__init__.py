@@ -13,6 +13,18 @@ import traceback
 from chainlit.logger import logger
 from chainlit.config import config
 import logging
+from .audio import PCM16Arena, PCM16Ring, AudioFrameCoalescer, DEFAULT_INPUT_RETENTION_MS, DEFAULT_OUTPUT_RETENTION_MS, DEFAULT_FRAME_MS
+from .vad import LocalVAD
+from .convert import AudioConverter, MODEL_SAMPLE_RATE
+from .journal import ConversationJournal
+from .store import ConversationItem, ResponseRecord
+from .compaction import CompactionPolicy, tool_status
+from .timing import TurnTimeline, process_latencies
+from .tracing import EventTracer
+from .scheduler import ToolScheduler, server_definition
+from .playback import PlaybackTracker
+from .recording import SessionRecorder, CLIENT, SERVER
+from .dispatch import DispatchQueue, WaiterRegistry, BLOCK, DROP_OLDEST, POLICIES, DEFAULT_MAXSIZE, keep_latest
 
 
 def float_to_16bit_pcm(float32_array):
@@ -64,69 +76,230 @@ def merge_int16_arrays(left, right):
 class RealtimeEventHandler:
     def __init__(self):
         self.event_handlers = defaultdict(list)
+        self.dispatch_queues = {}
+        self.dispatch_policies = {}
+        self.dispatch_downstream = []
+        self.waiters = WaiterRegistry()
 
     def on(self, event_name, handler):
         self.event_handlers[event_name].append(handler)
         
     def clear_event_handlers(self):
         self.event_handlers = defaultdict(list)
+        self.close_dispatch_queues()
+
+    def set_dispatch_policy(self, event_name, policy=BLOCK, maxsize=DEFAULT_MAXSIZE, coalesce=None):
+        """
+        Configure backpressure for the coroutine handlers of an event.
+        :param policy: "block" throttles producers, "drop_oldest" discards the oldest pending event,
+                       "coalesce" merges the new event into the newest pending one with `coalesce(previous, event)`
+        """
+        if policy not in POLICIES:
+            raise Exception(f'Unknown dispatch policy "{policy}", expected one of {POLICIES}')
+        self.dispatch_policies[event_name] = {"policy": policy, "maxsize": maxsize, "coalesce": coalesce}
+        queue = self.dispatch_queues.get(event_name)
+        if queue:
+            queue.policy = policy
+            queue.maxsize = maxsize
+            queue.coalesce = coalesce or keep_latest
 
     def dispatch(self, event_name, event):
-        for handler in self.event_handlers[event_name]:
+        if event_name in self.waiters.futures:
+            self.waiters.resolve(event_name, event)
+        handlers = self.event_handlers.get(event_name)
+        if not handlers:
+            return
+        queued = False
+        for handler in handlers:
             if inspect.iscoroutinefunction(handler):
-                asyncio.create_task(handler(event))
+                queued = True
             else:
                 handler(event)
-
-    async def wait_for_next(self, event_name):
-        future = asyncio.Future()
-
-        def handler(event):
-            if not future.done():
-                future.set_result(event)
-
-        self.on(event_name, handler)
-        return await future
+        if queued:
+            self._get_dispatch_queue(event_name).put(event)
+
+    def _get_dispatch_queue(self, event_name):
+        queue = self.dispatch_queues.get(event_name)
+        if queue is None:
+            queue = DispatchQueue(
+                event_name,
+                lambda: [h for h in self.event_handlers.get(event_name, []) if inspect.iscoroutinefunction(h)],
+                self._on_handler_error,
+                **self.dispatch_policies.get(event_name, {}),
+            )
+            self.dispatch_queues[event_name] = queue
+        return queue
+
+    def _on_handler_error(self, event_name, event, error):
+        if event_name != "error":
+            self.dispatch("error", {"type": "handler.error", "event_name": event_name, "event": event, "error": error})
+
+    async def wait_for_dispatch_capacity(self):
+        """Wait until no blocking dispatch queue (here or downstream) is over its limit."""
+        for queue in list(self.dispatch_queues.values()):
+            if queue.policy == BLOCK:
+                await queue.wait_for_capacity()
+        for handler in self.dispatch_downstream:
+            await handler.wait_for_dispatch_capacity()
+
+    async def join_dispatch_queues(self):
+        for queue in list(self.dispatch_queues.values()):
+            await queue.join()
+
+    def close_dispatch_queues(self):
+        for queue in self.dispatch_queues.values():
+            queue.close()
+        self.dispatch_queues = {}
+
+    def dispatch_stats(self):
+        return {name: queue.stats() for name, queue in self.dispatch_queues.items()}
+
+    async def wait_for_next(self, event_name, timeout=None):
+        return await self.waiters.wait(event_name, timeout)
+
+    def cancel_waiters(self):
+        self.waiters.cancel_all()
 
 
 class RealtimeAPI(RealtimeEventHandler):
-    def __init__(self):
+    def __init__(self, sample_rate=MODEL_SAMPLE_RATE, frame_ms=DEFAULT_FRAME_MS, send_queue_size=64, trace_sample_rates=None,
+                 url=None):
+        """
+        :param url: full websocket URL to dial instead of the Azure deployment, e.g. a local mock server;
+                    also read from REALTIME_API_URL
+        Set REALTIME_RECORD_DIR to record every connection to that directory (see start_recording).
+        """
         super().__init__()
         self.default_url = 'wss://api.openai.com/v1/realtime'
-        self.url = os.environ["AZURE_OPENAI_ENDPOINT"]
-        self.api_key = os.environ["AZURE_OPENAI_API_KEY"]
         self.api_version = "2024-10-01-preview"
-        self.azure_deployment = os.environ["AZURE_OPENAI_DEPLOYMENT"]
+        self.ws_url = url or os.environ.get("REALTIME_API_URL")
+        if self.ws_url:
+            self.url = self.ws_url
+            self.api_key = os.environ.get("AZURE_OPENAI_API_KEY")
+            self.azure_deployment = os.environ.get("AZURE_OPENAI_DEPLOYMENT")
+        else:
+            self.url = os.environ["AZURE_OPENAI_ENDPOINT"]
+            self.api_key = os.environ["AZURE_OPENAI_API_KEY"]
+            self.azure_deployment = os.environ["AZURE_OPENAI_DEPLOYMENT"]
+            self.ws_url = f"{self.url}/openai/realtime?api-version={self.api_version}&deployment={self.azure_deployment}&api-key={self.api_key}"
         self.ws = None
+        self.audio_frames = AudioFrameCoalescer(sample_rate, frame_ms)
+        self.send_queue_size = send_queue_size
+        self.input_audio_filter = None
+        self.send_queue = None
+        self.writer = None
+        self.receiver = None
+        self.session = None
+        self.tracer = EventTracer(logger, trace_sample_rates)
+        self.recorder = None
+        # Serialized session config of the last session.update on this connection
+        self.sent_session = None
 
     def is_connected(self):
         return self.ws is not None
 
-    def log(self, *args):
-        logger.debug(f"[Websocket/{datetime.utcnow().isoformat()}]", *args)
+    def log(self, message, *args):
+        self.tracer.message(message, *args)
 
     async def connect(self):
         if self.is_connected():
             raise Exception("Already connected")
-        self.ws = await websockets.connect(f"{self.url}/openai/realtime?api-version={self.api_version}&deployment={self.azure_deployment}&api-key={self.api_key}")
-        self.log(f"Connected to {self.url}")
-        asyncio.create_task(self._receive_messages())
+        self.ws = await websockets.connect(self.ws_url)
+        self.sent_session = None
+        self.log("Connected to %s", self.url)
+        record_dir = os.environ.get("REALTIME_RECORD_DIR")
+        if record_dir and self.recorder is None:
+            self.start_recording(os.path.join(record_dir, f"{self._generate_id('session_')}-{id(self):x}.rtrec"))
+        self.send_queue = asyncio.Queue(maxsize=self.send_queue_size)
+        self.writer = asyncio.create_task(self._send_messages())
+        self.receiver = asyncio.create_task(self._receive_messages())
+
+    async def update_session(self, session):
+        """
+        Send session.update unless this connection already received exactly this config.
+        :return: True if it was sent
+        """
+        serialized = json.dumps(session, sort_keys=True)
+        if serialized == self.sent_session:
+            return False
+        self.sent_session = serialized
+        await self.send("session.update", {"session": session})
+        return True
+
+    async def restart_receiver(self):
+        """
+        Recreate the receiver task from the calling task's context.
+        Handlers, dispatch workers and the tasks they start inherit the receiver's contextvars, so a connection
+        opened on behalf of one session (e.g. warmed by the pool) must be rebound before another session uses it.
+        """
+        if self.receiver is None:
+            return
+        if not self.receiver.done():
+            self.receiver.cancel()
+            # Only one coroutine may read the socket at a time
+            await asyncio.wait([self.receiver])
+        self.close_dispatch_queues()
+        if self.is_connected():
+            self.receiver = asyncio.create_task(self._receive_messages())
+
+    def is_alive(self):
+        """Connected and still reading from the socket."""
+        return self.is_connected() and self.receiver is not None and not self.receiver.done()
+
+    def start_recording(self, file):
+        """
+        Record every event sent and received from now on (see realtime.recording for the format).
+        :param file: path or binary file object
+        """
+        self.stop_recording()
+        self.recorder = SessionRecorder(file)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
 
     async def _receive_messages(self):
         async for message in self.ws:
-            event = json.loads(message)
-            if event['type'] == "error":
-                logger.error("ERROR", message)
-            self.log("received:", event)
-            self.dispatch(f"server.{event['type']}", event)
-            self.dispatch("server.*", event)
+            await self.handle_server_event(json.loads(message))
+
+    async def handle_server_event(self, event):
+        """Dispatch one server event; used for socket traffic and for replayed recordings."""
+        if event['type'] == "error":
+            logger.error("Realtime API error: %s", event)
+        self.tracer.trace("received", event)
+        if self.recorder is not None:
+            self.recorder.record(SERVER, event)
+        if event['type'] == "session.created":
+            self.session = event['session']
+        self.dispatch(f"server.{event['type']}", event)
+        self.dispatch("server.*", event)
+        await self.wait_for_dispatch_capacity()
+
+    async def _send_messages(self):
+        """Single writer: drains the send queue so callers never await the socket themselves."""
+        while True:
+            message = await self.send_queue.get()
+            if message is None:
+                break
+            try:
+                await self.ws.send(message)
+            except Exception:
+                logger.error(f"Websocket send failed:\n{traceback.format_exc()}")
+                break
 
     async def send(self, event_name, data=None):
         if not self.is_connected():
             raise Exception("RealtimeAPI is not connected")
+        if self.writer.done():
+            raise Exception("RealtimeAPI writer has stopped")
         data = data or {}
         if not isinstance(data, dict):
             raise Exception("data must be a dictionary")
+        if event_name != "input_audio_buffer.append":
+            # Audio still waiting for a full frame must reach the server before commits, responses, etc.
+            await self.flush_input_audio()
         event = {
             "event_id": self._generate_id("evt_"),
             "type": event_name,
@@ -134,20 +307,47 @@ class RealtimeAPI(RealtimeEventHandler):
         }
         self.dispatch(f"client.{event_name}", event)
         self.dispatch("client.*", event)
-        self.log("sent:", event)
-        await self.ws.send(json.dumps(event))
+        self.tracer.trace("sent", event)
+        if self.recorder is not None:
+            self.recorder.record(CLIENT, event)
+        # Serialize now: callers may mutate their dicts once send() returns
+        await self.send_queue.put(json.dumps(event))
+
+    async def append_input_audio(self, data):
+        """Coalesce microphone audio into fixed-duration input_audio_buffer.append frames."""
+        for frame in self.audio_frames.push(data):
+            await self._send_audio_frame(frame)
+
+    async def flush_input_audio(self):
+        frame = self.audio_frames.flush()
+        if frame:
+            await self._send_audio_frame(frame)
+
+    async def _send_audio_frame(self, frame):
+        # input_audio_filter (e.g. LocalVAD) may hold back or release several frames
+        frames = self.input_audio_filter.process(frame) if self.input_audio_filter else (frame,)
+        for frame in frames:
+            await self.send("input_audio_buffer.append", {"audio": base64.b64encode(frame).decode("ascii")})
 
     def _generate_id(self, prefix):
         return f"{prefix}{int(datetime.utcnow().timestamp() * 1000)}"
 
     async def disconnect(self):
         if self.ws:
+            if not self.writer.done():
+                await self.flush_input_audio()
+                await self.send_queue.put(None)
+                await self.writer
             await self.ws.close()
             self.ws = None
-            self.log(f"Disconnected from {self.url}")
+            self.session = None
+            self.cancel_waiters()
+            self.stop_recording()
+            self.log("Disconnected from %s", self.url)
 
 class RealtimeConversation:
-    default_frequency = config.features.audio.sample_rate
+    # Audio is converted to the model rate on the way in and arrives at it on the way out
+    default_frequency = MODEL_SAMPLE_RATE
     
     EventProcessors = {
         'conversation.item.created': lambda self, event: self._process_item_created(event),
@@ -159,60 +359,42 @@ class RealtimeConversation:
         'response.created': lambda self, event: self._process_response_created(event),
         'response.output_item.added': lambda self, event: self._process_output_item_added(event),
         'response.output_item.done': lambda self, event: self._process_output_item_done(event),
+        'response.done': lambda self, event: self._process_response_done(event),
         'response.content_part.added': lambda self, event: self._process_content_part_added(event),
         'response.audio_transcript.delta': lambda self, event: self._process_audio_transcript_delta(event),
         'response.audio.delta': lambda self, event: self._process_audio_delta(event),
         'response.text.delta': lambda self, event: self._process_text_delta(event),
         'response.function_call_arguments.delta': lambda self, event: self._process_function_call_arguments_delta(event),
     }
+
+    JournalActions = {
+        'conversation.item.created': 'created',
+        'conversation.item.truncated': 'truncated',
+        'conversation.item.deleted': 'deleted',
+        'conversation.item.input_audio_transcription.completed': 'transcribed',
+        'response.output_item.done': 'completed',
+    }
     
-    def __init__(self):
+    def __init__(self, output_audio_retention_ms=None):
+        """
+        :param output_audio_retention_ms: optional cap on the assistant audio kept; with a cap only the newest
+                                          assistant item keeps audio, earlier items keep just their sample count
+        """
+        self.output_audio_max_bytes = None
+        if output_audio_retention_ms is not None:
+            self.output_audio_max_bytes = self.default_frequency * output_audio_retention_ms // 1000 * 2
         self.clear()
-        self.turn_counter = 0
         self.logger = logging.getLogger(__name__)
+        self.journal = ConversationJournal(self.logger)
 
     def clear(self):
+        # Insertion-ordered, so it is both the O(1) index and the item order
         self.item_lookup = {}
-        self.items = []
         self.response_lookup = {}
-        self.responses = []
         self.queued_speech_items = {}
         self.queued_transcript_items = {}
         self.queued_input_audio = None
-        self.turn_counter = 0
-
-    def _log_conversation_state(self):
-        """Log the current state of the conversation"""
-        self.turn_counter += 1
-        self.logger.info(f"\n{'='*40} Conversation Turn #{self.turn_counter} {'='*40}")
-        
-        # Log all items in sequence
-        for idx, item in enumerate(self.items, 1):
-            item_type = item.get('type', 'unknown')
-            if item_type == 'message':
-                text = item.get('formatted', {}).get('text', '')
-                transcript = item.get('formatted', {}).get('transcript', '')
-                self.logger.info(f"\nMessage #{idx} from {item.get('role', 'unknown')}:")
-                if transcript:
-                    self.logger.info(f"Transcript: {transcript}")
-                if text and text != transcript:
-                    self.logger.info(f"Text: {text}")
-            elif item_type == 'function_call':
-                self.logger.info(f"\nTool Call #{idx}:")
-                self.logger.info(f"Tool: {item.get('formatted', {}).get('tool', {}).get('name')}")
-                self.logger.info(f"Arguments: {item.get('formatted', {}).get('tool', {}).get('arguments')}")
-            elif item_type == 'function_call_output':
-                self.logger.info(f"\nTool Result #{idx}:")
-                try:
-                    output_json = json.loads(item.get('formatted', {}).get('output', '{}'))
-                    if isinstance(output_json, str):
-                        self.logger.info(f"Status: {output_json}")
-                    else:
-                        self.logger.info(f"Full Output:\n{json.dumps(output_json, indent=2)}")
-                except:
-                    self.logger.info(f"Output: {item.get('formatted', {}).get('output', '')}")
-        
-        self.logger.info(f"\n{'='*100}\n")
+        self.output_audio_item = None
 
     def process_event(self, event, *args):
         event_processor = self.EventProcessors.get(event['type'])
@@ -220,61 +402,127 @@ class RealtimeConversation:
             raise Exception(f"Missing conversation event processor for {event['type']}")
         result = event_processor(self, event, *args)
         
-        # Log after processing certain types of events
-        if event['type'] in ['conversation.item.created', 'response.output_item.done']:
-            self._log_conversation_state()
+        # Journal only the item this event touched
+        action = self.JournalActions.get(event['type'])
+        if action:
+            self.journal.record(action, result[0])
         
         return result
 
+    @property
+    def items(self):
+        return self.item_lookup.values()
+
+    @property
+    def responses(self):
+        return self.response_lookup.values()
+
+    def summary(self):
+        return {"items": len(self.item_lookup), "responses": len(self.response_lookup), **self.journal.summary()}
+
     def queue_input_audio(self, input_audio):
-        self.queued_input_audio = input_audio
+        # Input ring views are overwritten once the retention window passes; items keep a copy
+        self.queued_input_audio = bytes(input_audio)
 
     def get_item(self, id):
         return self.item_lookup.get(id)
 
     def get_items(self):
-        return self.items[:]
+        """Live, read-only view of the items in order; copy it with list() before mutating the conversation."""
+        return self.item_lookup.values()
+
+    def get_output_audio(self, id):
+        """The PCM16Arena holding an assistant item's audio, if any was received."""
+        item = self.item_lookup.get(id)
+        if item is not None and isinstance(item.audio, PCM16Arena):
+            return item.audio
+        return None
+
+    def snapshot(self):
+        """
+        Compact copy of the conversation that can be replayed with conversation.item.create.
+        Audio is replaced by its transcript and each tool call/output pair collapses into
+        one system note with the tool name and result status.
+        """
+        snapshot = []
+        calls = {}
+        for item in self.item_lookup.values():
+            if item.type == 'message':
+                text = item.text or item.transcript or ''
+                if not text.strip():
+                    continue
+                content_type = 'text' if item.role == 'assistant' else 'input_text'
+                snapshot.append({
+                    'type': 'message',
+                    'role': item.role,
+                    'content': [{'type': content_type, 'text': text}],
+                })
+            elif item.type == 'function_call':
+                calls[item.call_id] = item
+            elif item.type == 'function_call_output':
+                call = calls.pop(item.call_id, None)
+                if not call:
+                    continue
+                snapshot.append({
+                    'type': 'message',
+                    'role': 'system',
+                    'content': [{
+                        'type': 'input_text',
+                        'text': f"Tool {call.name} was called and returned: {tool_status(item.output) or 'done'}",
+                    }],
+                })
+        return snapshot
+
+    def _insert_item(self, item, event):
+        """
+        Place a new item where the server put it. previous_item_id is null for an item with no predecessor
+        (e.g. created with previous_item_id "root"); items are appended when it is absent or unknown.
+        The dict is reordered in place so live get_items() views stay valid.
+        """
+        lookup = self.item_lookup
+        if 'previous_item_id' not in event or not lookup:
+            lookup[item.id] = item
+            return
+        previous_item_id = event['previous_item_id']
+        if previous_item_id is not None and (previous_item_id not in lookup or previous_item_id == next(reversed(lookup))):
+            lookup[item.id] = item
+            return
+        items = list(lookup.items())
+        lookup.clear()
+        if previous_item_id is None:
+            lookup[item.id] = item
+        for key, value in items:
+            lookup[key] = value
+            if key == previous_item_id:
+                lookup[item.id] = item
 
     def _process_item_created(self, event):
-        item = event['item']
-        new_item = item.copy()
-        if new_item['id'] not in self.item_lookup:
-            self.item_lookup[new_item['id']] = new_item
-            self.items.append(new_item)
-        new_item['formatted'] = {
-            'audio': [],
-            'text': '',
-            'transcript': ''
-        }
-        if new_item['id'] in self.queued_speech_items:
-            new_item['formatted']['audio'] = self.queued_speech_items[new_item['id']]['audio']
-            del self.queued_speech_items[new_item['id']]
-        if 'content' in new_item:
-            text_content = [c for c in new_item['content'] if c['type'] in ['text', 'input_text']]
-            for content in text_content:
-                new_item['formatted']['text'] += content['text']
-        if new_item['id'] in self.queued_transcript_items:
-            new_item['formatted']['transcript'] = self.queued_transcript_items[new_item['id']]['transcript']
-            del self.queued_transcript_items[new_item['id']]
-        if new_item['type'] == 'message':
-            if new_item['role'] == 'user':
-                new_item['status'] = 'completed'
+        item_id = event['item']['id']
+        new_item = self.item_lookup.get(item_id)
+        if new_item is None:
+            new_item = ConversationItem(event['item'])
+            self._insert_item(new_item, event)
+        if item_id in self.queued_speech_items:
+            new_item.audio = self.queued_speech_items.pop(item_id)['audio']
+        if new_item.content:
+            new_item.text = ''.join(c['text'] for c in new_item.content if c['type'] in ['text', 'input_text'])
+        if item_id in self.queued_transcript_items:
+            new_item.transcript = self.queued_transcript_items.pop(item_id)['transcript']
+        if new_item.type == 'message':
+            if new_item.role == 'user':
+                new_item.status = 'completed'
                 if self.queued_input_audio:
-                    new_item['formatted']['audio'] = self.queued_input_audio
+                    new_item.audio = self.queued_input_audio
                     self.queued_input_audio = None
             else:
-                new_item['status'] = 'in_progress'
-        elif new_item['type'] == 'function_call':
-            new_item['formatted']['tool'] = {
-                'type': 'function',
-                'name': new_item['name'],
-                'call_id': new_item['call_id'],
-                'arguments': ''
-            }
-            new_item['status'] = 'in_progress'
-        elif new_item['type'] == 'function_call_output':
-            new_item['status'] = 'completed'
-            new_item['formatted']['output'] = new_item['output']
+                # Items the client created (summaries, resumed items) arrive completed and get no output_item.done
+                new_item.status = event['item'].get('status') or 'in_progress'
+        elif new_item.type == 'function_call':
+            new_item.status = event['item'].get('status') or 'in_progress'
+            if new_item.status == 'in_progress':
+                new_item.arguments = ''
+        elif new_item.type == 'function_call_output':
+            new_item.status = 'completed'
         return new_item, None
 
     def _process_item_truncated(self, event):
@@ -284,8 +532,11 @@ class RealtimeConversation:
         if not item:
             raise Exception(f'item.truncated: Item "{item_id}" not found')
         end_index = (audio_end_ms * self.default_frequency) // 1000
-        item['formatted']['transcript'] = ''
-        item['formatted']['audio'] = item['formatted']['audio'][:end_index]
+        item.transcript = ''
+        if isinstance(item.audio, PCM16Arena):
+            item.audio.truncate(end_index)
+        else:
+            item.audio = item.audio[:end_index * 2]
         return item, None
 
     def _process_item_deleted(self, event):
@@ -293,8 +544,7 @@ class RealtimeConversation:
         item = self.item_lookup.get(item_id)
         if not item:
             raise Exception(f'item.deleted: Item "{item_id}" not found')
-        del self.item_lookup[item['id']]
-        self.items.remove(item)
+        del self.item_lookup[item_id]
         return item, None
 
     def _process_input_audio_transcription_completed(self, event):
@@ -308,11 +558,10 @@ class RealtimeConversation:
             return None, None
         
         # Update both the content and formatted text
-        item['content'][content_index]['transcript'] = transcript
-        item['formatted']['transcript'] = formatted_transcript
-        if item['type'] == 'message' and item['role'] == 'user':
-            item['formatted']['text'] = formatted_transcript  # Also update the text field for messages
-            self.logger.info(f"\nTranscribed Audio -> Text: {formatted_transcript}")
+        item.content[content_index]['transcript'] = transcript
+        item.transcript = formatted_transcript
+        if item.type == 'message' and item.role == 'user':
+            item.text = formatted_transcript  # Also update the text field for messages
         
         return item, {'transcript': transcript}
 
@@ -327,17 +576,17 @@ class RealtimeConversation:
         audio_end_ms = event['audio_end_ms']
         speech = self.queued_speech_items[item_id]
         speech['audio_end_ms'] = audio_end_ms
-        if input_audio_buffer:
-            start_index = (speech['audio_start_ms'] * self.default_frequency) // 1000
-            end_index = (speech['audio_end_ms'] * self.default_frequency) // 1000
-            speech['audio'] = input_audio_buffer[start_index:end_index]
+        if input_audio_buffer is not None:
+            start_sample = (speech['audio_start_ms'] * self.default_frequency) // 1000
+            end_sample = (speech['audio_end_ms'] * self.default_frequency) // 1000
+            # One copy per turn: the ring slice is overwritten once the retention window passes
+            speech['audio'] = bytes(input_audio_buffer.slice(start_sample, end_sample))
         return None, None
 
     def _process_response_created(self, event):
         response = event['response']
         if response['id'] not in self.response_lookup:
-            self.response_lookup[response['id']] = response
-            self.responses.append(response)
+            self.response_lookup[response['id']] = ResponseRecord(response)
         return None, None
 
     def _process_output_item_added(self, event):
@@ -346,7 +595,20 @@ class RealtimeConversation:
         response = self.response_lookup.get(response_id)
         if not response:
             raise Exception(f'response.output_item.added: Response "{response_id}" not found')
-        response['output'].append(item['id'])
+        response.output.append(item['id'])
+        return None, None
+
+    def _process_response_done(self, event):
+        """Close the items of a finished response that never got output_item.done (e.g. it was cancelled)."""
+        response = event['response']
+        record = self.response_lookup.get(response['id'])
+        if record is not None:
+            record.status = response.get('status')
+        final = {item['id']: item.get('status') for item in response.get('output') or ()}
+        for item_id in set(final) | set(record.output if record is not None else ()):
+            item = self.item_lookup.get(item_id)
+            if item is not None and item.status == 'in_progress':
+                item.status = final.get(item_id) or 'incomplete'
         return None, None
 
     def _process_output_item_done(self, event):
@@ -356,7 +618,10 @@ class RealtimeConversation:
         found_item = self.item_lookup.get(item['id'])
         if not found_item:
             raise Exception(f'response.output_item.done: Item "{item["id"]}" not found')
-        found_item['status'] = item['status']
+        found_item.status = item['status']
+        if item.get('content') is not None:
+            # The server sends the finished parts; adopt them instead of rebuilding each part per delta
+            found_item.content = item['content']
         return found_item, None
 
     def _process_content_part_added(self, event):
@@ -365,7 +630,7 @@ class RealtimeConversation:
         item = self.item_lookup.get(item_id)
         if not item:
             raise Exception(f'response.content_part.added: Item "{item_id}" not found')
-        item['content'].append(part)
+        item.content.append(part)
         return item, None
 
     def _process_audio_transcript_delta(self, event):
@@ -375,8 +640,7 @@ class RealtimeConversation:
         item = self.item_lookup.get(item_id)
         if not item:
             raise Exception(f'response.audio_transcript.delta: Item "{item_id}" not found')
-        item['content'][content_index]['transcript'] += delta
-        item['formatted']['transcript'] += delta
+        item.append_transcript(delta)
         return item, {'transcript': delta}
 
     def _process_audio_delta(self, event):
@@ -387,10 +651,14 @@ class RealtimeConversation:
         if not item:
             logger.debug(f'response.audio.delta: Item "{item_id}" not found')
             return None, None
-        array_buffer = base64_to_array_buffer(delta)
-        append_values = array_buffer.tobytes()
-        # TODO: make it work
-        # item['formatted']['audio'] = merge_int16_arrays(item['formatted']['audio'], append_values)
+        if not isinstance(item.audio, PCM16Arena):
+            item.audio = PCM16Arena(max_bytes=self.output_audio_max_bytes)
+            previous = self.output_audio_item
+            if self.output_audio_max_bytes is not None and previous is not None and isinstance(previous.audio, PCM16Arena):
+                previous.audio.release()
+            self.output_audio_item = item
+        # memoryview into the item's arena, no intermediate numpy array or extra copy
+        append_values = item.audio.append_base64(delta)
         return item, {'audio': append_values}
 
     def _process_text_delta(self, event):
@@ -400,8 +668,7 @@ class RealtimeConversation:
         item = self.item_lookup.get(item_id)
         if not item:
             raise Exception(f'response.text.delta: Item "{item_id}" not found')
-        item['content'][content_index]['text'] += delta
-        item['formatted']['text'] += delta
+        item.append_text(delta)
         return item, {'text': delta}
 
     def _process_function_call_arguments_delta(self, event):
@@ -410,15 +677,21 @@ class RealtimeConversation:
         item = self.item_lookup.get(item_id)
         if not item:
             raise Exception(f'response.function_call_arguments.delta: Item "{item_id}" not found')
-        item['arguments'] += delta
-        item['formatted']['tool']['arguments'] += delta
+        item.append_arguments(delta)
         return item, {'arguments': delta}
 
 
 class RealtimeClient(RealtimeEventHandler):
-    def __init__(self, system_prompt: str):
+    def __init__(self, system_prompt: str, input_audio_retention_ms=DEFAULT_INPUT_RETENTION_MS, local_vad=False,
+                 input_sample_rate=config.features.audio.sample_rate, input_channels=1, input_format="pcm16",
+                 output_audio_retention_ms=DEFAULT_OUTPUT_RETENTION_MS, compaction_policy=None, interrupt_on_speech=True, url=None):
         super().__init__()
         self.system_prompt = system_prompt
+        self.input_sample_rate = input_sample_rate
+        self.input_channels = input_channels
+        self.input_format = input_format
+        self.input_audio_retention_ms = input_audio_retention_ms
+        self.use_local_vad = local_vad
         self.default_session_config = {
             "modalities": ["text", "audio"],
             "instructions": self.system_prompt,
@@ -440,19 +713,42 @@ class RealtimeClient(RealtimeEventHandler):
             "prefix_padding_ms": 300,
             "silence_duration_ms": 200,
         }
-        self.realtime = RealtimeAPI()
-        self.conversation = RealtimeConversation()
+        self.realtime = RealtimeAPI(url=url)
+        self.conversation = RealtimeConversation(output_audio_retention_ms)
+        self.compaction_policy = compaction_policy
+        self.pending_deletes = set()
+        self.timing = TurnTimeline()
+        self.tool_scheduler = ToolScheduler(lambda name: self.tools.get(name))
+        self.interrupt_on_speech = interrupt_on_speech
+        self.playback = PlaybackTracker(RealtimeConversation.default_frequency)
+        self.active_response_id = None
+        self.set_dispatch_policy("realtime.event", DROP_OLDEST)
         self._reset_config()
         self._add_api_event_handlers()
         
     def _reset_config(self):
         self.session_created = False
+        self.session_created_future = None
         self.tools = {}
+        self.tools_payload = None
         self.session_config = self.default_session_config.copy()
-        self.input_audio_buffer = bytearray()
+        self.input_audio_buffer = PCM16Ring(RealtimeConversation.default_frequency, self.input_audio_retention_ms)
+        self.input_converter = None
+        if (self.input_sample_rate, self.input_channels, self.input_format) != (MODEL_SAMPLE_RATE, 1, "pcm16"):
+            self.input_converter = AudioConverter(self.input_sample_rate, MODEL_SAMPLE_RATE, self.input_channels, self.input_format)
+        self.local_vad = None
+        if self.use_local_vad:
+            self.local_vad = LocalVAD(
+                RealtimeConversation.default_frequency,
+                prefix_padding_ms=self.default_server_vad_config["prefix_padding_ms"],
+                hangover_ms=self.default_server_vad_config["silence_duration_ms"] + 300,
+            )
+        self.resume_items = []
         return True
 
     def _add_api_event_handlers(self):
+        self.realtime.dispatch_downstream = [self]
+        self.realtime.input_audio_filter = self.local_vad
         self.realtime.on("client.*", self._log_event)
         self.realtime.on("server.*", self._log_event)
         self.realtime.on("server.session.created", self._on_session_created)
@@ -460,6 +756,11 @@ class RealtimeClient(RealtimeEventHandler):
         self.realtime.on("server.response.output_item.added", self._process_event)
         self.realtime.on("server.response.content_part.added", self._process_event)
         self.realtime.on("server.input_audio_buffer.speech_started", self._on_speech_started)
+        if self.interrupt_on_speech:
+            self.realtime.on("server.input_audio_buffer.speech_started", self._on_barge_in)
+        self.realtime.on("server.response.created", self._track_active_response)
+        self.realtime.on("server.response.done", self._track_active_response)
+        self.realtime.on("server.response.done", self._process_event)
         self.realtime.on("server.input_audio_buffer.speech_stopped", self._on_speech_stopped)
         self.realtime.on("server.conversation.item.created", self._on_item_created)
         self.realtime.on("server.conversation.item.truncated", self._process_event)
@@ -468,10 +769,37 @@ class RealtimeClient(RealtimeEventHandler):
         self.realtime.on("server.response.audio_transcript.delta", self._process_event)
         self.realtime.on("server.response.audio.delta", self._process_event)
         self.realtime.on("server.response.text.delta", self._process_event)
-        self.realtime.on("server.response.function_call_arguments.delta", self._process_event)
+        self.realtime.on("server.response.function_call_arguments.delta", self._on_function_call_arguments_delta)
         self.realtime.on("server.response.output_item.done", self._on_output_item_done)
+        self.realtime.on("server.response.done", self._on_response_done)
+        self._add_timing_handlers()
+
+    def _add_timing_handlers(self):
+        timing = self.timing
+        self.realtime.on("server.input_audio_buffer.speech_stopped", lambda event: timing.begin("speech_stopped"))
+        self.realtime.on("server.response.created", lambda event: timing.stamp("response_created"))
+        self.realtime.on("server.response.audio.delta", lambda event: timing.stamp_audio())
+        self.realtime.on("server.response.function_call_arguments.done", lambda event: timing.stamp("arguments_done"))
+        self.realtime.on("client.response.create", self._on_response_create_sent)
+        self.realtime.on("server.response.done", self._on_response_done_timing)
+
+    def _on_response_create_sent(self, event):
+        if self.timing.points is not None and "tool_end" in self.timing.points:
+            self.timing.stamp("followup_create")
+        else:
+            self.timing.stamp("response_create")
+
+    def _on_response_done_timing(self, event):
+        output = event.get("response", {}).get("output") or []
+        if any(item.get("type") == "function_call" for item in output):
+            # A follow-up response will carry the rest of this turn
+            return
+        self.timing.finish()
 
     def _log_event(self, event):
+        if not self.event_handlers.get("realtime.event") and "realtime.event" not in self.waiters.futures:
+            # Nobody consumes realtime.event, don't build it for every audio delta
+            return
         realtime_event = {
             "time": datetime.utcnow().isoformat(),
             "source": "client" if event["type"].startswith("client.") else "server",
@@ -481,6 +809,9 @@ class RealtimeClient(RealtimeEventHandler):
 
     def _on_session_created(self, event):
         self.session_created = True
+        self.timing.session_id = event.get("session", {}).get("id")
+        if self.session_created_future and not self.session_created_future.done():
+            self.session_created_future.set_result(event)
 
     def _process_event(self, event, *args):
         item, delta = self.conversation.process_event(event, *args)
@@ -490,12 +821,45 @@ class RealtimeClient(RealtimeEventHandler):
             self.dispatch("conversation.updated", {"item": item, "delta": delta})
         return item, delta
 
+    def _to_local_audio_offsets(self, event):
+        """Server offsets only count uploaded audio; map them back to the input ring when silence was suppressed."""
+        if not self.local_vad:
+            return event
+        event = dict(event)
+        for key in ("audio_start_ms", "audio_end_ms"):
+            if key in event:
+                event[key] = self.local_vad.to_local_ms(event[key])
+        return event
+
     def _on_speech_started(self, event):
-        self._process_event(event)
+        self._process_event(self._to_local_audio_offsets(event))
         self.dispatch("conversation.interrupted", event)
 
+    def _track_active_response(self, event):
+        if event["type"] == "response.created":
+            self.active_response_id = event["response"]["id"]
+        elif event["response"]["id"] == self.active_response_id:
+            self.active_response_id = None
+
+    async def _on_barge_in(self, event):
+        await self.interrupt()
+
+    async def interrupt(self):
+        """
+        The user started speaking over the assistant: cancel the in-flight response and truncate the
+        item being played at the last sample the user heard, so unheard audio and transcript leave the context.
+        """
+        item_id, played = self.playback.interrupt()
+        if self.active_response_id:
+            self.active_response_id = None
+            await self.realtime.send("response.cancel")
+        if item_id:
+            audio = self.conversation.get_output_audio(item_id)
+            if audio is not None and played < audio.end_sample:
+                await self.truncate_audio(item_id, played)
+
     def _on_speech_stopped(self, event):
-        self._process_event(event, self.input_audio_buffer)
+        self._process_event(self._to_local_audio_offsets(event), self.input_audio_buffer)
 
     def _on_item_created(self, event):
         item, delta = self._process_event(event)
@@ -503,35 +867,66 @@ class RealtimeClient(RealtimeEventHandler):
         if item and item["status"] == "completed":
             self.dispatch("conversation.item.completed", {"item": item})
 
-    async def _on_output_item_done(self, event):
+    def _on_function_call_arguments_delta(self, event):
+        item, delta = self._process_event(event)
+        if item and item.type == "function_call" and self.tool_scheduler.feed_arguments(item, event["delta"], event.get("response_id")):
+            self.timing.stamp("speculative_tool_start")
+
+    def _on_output_item_done(self, event):
+        # Synchronous so the call is scheduled before response.done is dispatched
         item, delta = self._process_event(event)
         if item and item["status"] == "completed":
             self.dispatch("conversation.item.completed", {"item": item})
-        if item and item.get("formatted", {}).get("tool"):
-            await self._call_tool(item["formatted"]["tool"])
-
-    async def _call_tool(self, tool):
-        try:
-            print(tool["arguments"])
-            json_arguments = json.loads(tool["arguments"])
-            tool_config = self.tools.get(tool["name"])
-            if not tool_config:
-                raise Exception(f'Tool "{tool["name"]}" has not been added')
-            result = await tool_config["handler"](**json_arguments)
+        if item and item.type == "function_call":
+            self.timing.stamp("tool_start")
+            self.tool_scheduler.submit(event.get("response_id"), item.formatted["tool"])
+
+    async def _on_response_done(self, event):
+        response_id = event.get("response", {}).get("id")
+        # Calls the response never completed (e.g. it was cancelled) must not run on or be rendered
+        self.tool_scheduler.discard_speculative(response_id)
+        if self.tool_scheduler.has_pending(response_id):
+            await self._post_tool_outputs(response_id)
+        if self.compaction_policy:
+            await self.compact_conversation()
+
+    async def compact_conversation(self):
+        """
+        Apply the compaction policy: delete old items on the server and, if the policy
+        summarizes, add a short system note in their place at the start of the conversation.
+        :return: the CompactionPlan that was applied, or None
+        """
+        if not self.compaction_policy or not self.is_connected():
+            return None
+        self.pending_deletes &= self.conversation.item_lookup.keys()
+        plan = self.compaction_policy.plan(self.conversation.get_items(), self.pending_deletes)
+        if not plan:
+            return None
+        logger.info(f"Compacting conversation: {plan}")
+        if plan.summary:
             await self.realtime.send("conversation.item.create", {
+                "previous_item_id": "root",
                 "item": {
-                    "type": "function_call_output",
-                    "call_id": tool["call_id"],
-                    "output": json.dumps(result),
-                }
+                    "type": "message",
+                    "role": "system",
+                    "content": [{"type": "input_text", "text": plan.summary}],
+                },
             })
-        except Exception as e:
-            logger.error(traceback.format_exc())
+        for item_id in plan.delete_ids:
+            self.pending_deletes.add(item_id)
+            await self.delete_item(item_id)
+        return plan
+
+    async def _post_tool_outputs(self, response_id):
+        """Wait for every function call of the response, post the outputs, then ask for one follow-up response."""
+        results = await self.tool_scheduler.collect(response_id)
+        self.timing.stamp("tool_end")
+        for tool, output in results:
             await self.realtime.send("conversation.item.create", {
                 "item": {
                     "type": "function_call_output",
                     "call_id": tool["call_id"],
-                    "output": json.dumps({"error": str(e)}),
+                    "output": output,
                 }
             })
         await self.create_response()
@@ -546,22 +941,66 @@ class RealtimeClient(RealtimeEventHandler):
         self._add_api_event_handlers()
         return True
 
-    async def connect(self):
+    async def connect(self, realtime=None, resume=False):
+        """
+        Connect to the Realtime API.
+        :param realtime: optional already connected RealtimeAPI (e.g. from a RealtimeConnectionPool) to adopt instead of dialing
+        :param resume: replay the conversation saved by the last disconnect()
+        """
         if self.is_connected():
             raise Exception("Already connected, use .disconnect() first")
-        await self.realtime.connect()
+        if realtime is not None:
+            self._attach_realtime(realtime)
+            # Run this session's handlers in its own context, not the one that opened the connection
+            await realtime.restart_receiver()
+        else:
+            await self.realtime.connect()
         await self.update_session()
+        if resume and self.resume_items:
+            await self.resume(self.resume_items)
         return True
 
-    async def wait_for_session_created(self):
+    async def resume(self, items):
+        """
+        Recreate conversation items on the server in one burst.
+        The sends are pipelined through the writer queue, so the whole replay costs a single round trip.
+        """
+        for item in items:
+            await self.create_conversation_item(item)
+        self.resume_items = []
+        return True
+
+    def _attach_realtime(self, realtime):
+        self.realtime.clear_event_handlers()
+        self.realtime = realtime
+        self._add_api_event_handlers()
+        self.session_created = realtime.session is not None
+        if self.session_created:
+            # A warmed connection saw session.created before it was attached
+            self.timing.session_id = realtime.session.get("id")
+
+    async def wait_for_session_created(self, timeout=None):
         if not self.is_connected():
             raise Exception("Not connected, use .connect() first")
-        while not self.session_created:
-            await asyncio.sleep(0.001)
+        if self.session_created:
+            return True
+        if self.session_created_future is None:
+            self.session_created_future = asyncio.get_running_loop().create_future()
+        # Shield so one caller timing out does not cancel the future for the others
+        await asyncio.wait_for(asyncio.shield(self.session_created_future), timeout)
         return True
 
     async def disconnect(self):
         self.session_created = False
+        if self.session_created_future:
+            self.session_created_future.cancel()
+            self.session_created_future = None
+        self.cancel_waiters()
+        self.tool_scheduler.cancel_all()
+        self.playback.clear()
+        self.active_response_id = None
+        if self.conversation.item_lookup:
+            self.resume_items = self.conversation.snapshot()
         self.conversation.clear()
         if self.realtime.is_connected():
             await self.realtime.disconnect()
@@ -569,42 +1008,80 @@ class RealtimeClient(RealtimeEventHandler):
     def get_turn_detection_type(self):
         return self.session_config.get("turn_detection", {}).get("type")
 
-    async def add_tool(self, definition, handler):
-        if not definition.get("name"):
-            raise Exception("Missing tool name in definition")
-        name = definition["name"]
-        if name in self.tools:
-            raise Exception(f'Tool "{name}" already added. Please use .removeTool("{name}") before trying to add again.')
-        if not callable(handler):
-            raise Exception(f'Tool "{name}" handler must be a function')
-        self.tools[name] = {"definition": definition, "handler": handler}
+    async def add_tool(self, definition, handler, render=None):
+        """
+        :param handler: coroutine function called with the tool arguments; its result is sent to the model
+        :param render: optional coroutine function called with (result, **arguments) on every call, cached or not,
+                       to show the result in the chat
+        """
+        await self.add_tools([(definition, handler, render)])
+        return self.tools[definition["name"]]
+
+    async def add_tools(self, tools):
+        """
+        Add several tools at once with a single session.update.
+        Every definition is validated before any is added, so one bad tool leaves the registered set unchanged.
+        :param tools: iterable of (definition, handler) or (definition, handler, render) tuples, as for add_tool
+        """
+        added = {}
+        for definition, handler, *render in tools:
+            name = definition.get("name")
+            if not name:
+                raise Exception("Missing tool name in definition")
+            if name in self.tools or name in added:
+                raise Exception(f'Tool "{name}" already added. Please use .removeTool("{name}") before trying to add again.')
+            if not callable(handler):
+                raise Exception(f'Tool "{name}" handler must be a function')
+            added[name] = {"definition": definition, "handler": handler, "render": render[0] if render else None}
+        if not added:
+            return True
+        self.tools.update(added)
+        self.tools_payload = None
         await self.update_session()
-        return self.tools[name]
+        return True
+
+    register_tools = add_tools
 
     def remove_tool(self, name):
         if name not in self.tools:
             raise Exception(f'Tool "{name}" does not exist, can not be removed.')
         del self.tools[name]
+        self.tools_payload = None
         return True
 
     async def delete_item(self, id):
         await self.realtime.send("conversation.item.delete", {"item_id": id})
         return True
 
+    def _get_tools_payload(self):
+        """Tools as sent in session.update; rebuilt only after the tools or session_config["tools"] change."""
+        if self.tools_payload is None:
+            self.tools_payload = [
+                {**tool_definition, "type": "function"}
+                for tool_definition in self.session_config.get("tools", [])
+            ] + [
+                {**server_definition(self.tools[key]["definition"]), "type": "function"}
+                for key in self.tools
+            ]
+        return self.tools_payload
+
+    def session_payload(self):
+        """The session config as sent in session.update, e.g. for RealtimeConnectionPool(session=...)."""
+        return {**self.session_config, "tools": self._get_tools_payload()}
+
     async def update_session(self, **kwargs):
+        """
+        Update the session config and send it if connected.
+        session.update is only sent when the config differs from what this connection last received,
+        including a pooled connection warmed with the same config.
+        """
         self.session_config.update(kwargs)
-        use_tools = [
-            {**tool_definition, "type": "function"}
-            for tool_definition in self.session_config.get("tools", [])
-        ] + [
-            {**self.tools[key]["definition"], "type": "function"}
-            for key in self.tools
-        ]
-        session = {**self.session_config, "tools": use_tools}
+        if "tools" in kwargs:
+            self.tools_payload = None
         if self.realtime.is_connected():
-            await self.realtime.send("session.update", {"session": session})
+            await self.realtime.update_session(self.session_payload())
         return True
-    
+
     async def create_conversation_item(self, item):
         await self.realtime.send("conversation.item.create", {
             "item": item
@@ -627,22 +1104,25 @@ class RealtimeClient(RealtimeEventHandler):
         return True
 
     async def append_input_audio(self, array_buffer):
+        if self.input_converter:
+            array_buffer = self.input_converter.convert(array_buffer)
         if len(array_buffer) > 0:
-            await self.realtime.send("input_audio_buffer.append", {
-                "audio": array_buffer_to_base64(np.array(array_buffer)),
-            })
-            self.input_audio_buffer.extend(array_buffer)
+            self.input_audio_buffer.append(array_buffer)
+            await self.realtime.append_input_audio(array_buffer)
         return True
 
     async def create_response(self):
-        if self.get_turn_detection_type() is None and len(self.input_audio_buffer) > 0:
+        if self.get_turn_detection_type() is None and self.input_audio_buffer.uncommitted_bytes > 0:
             await self.realtime.send("input_audio_buffer.commit")
-            self.conversation.queue_input_audio(self.input_audio_buffer)
-            self.input_audio_buffer = bytearray()
+            self.conversation.queue_input_audio(self.input_audio_buffer.take_uncommitted())
         await self.realtime.send("response.create")
         return True
 
-    async def cancel_response(self, id=None, sample_count=0):
+    async def cancel_response(self, id=None, sample_count=None):
+        """
+        Cancel the in-flight response and, for an assistant item, truncate its audio on the server.
+        :param sample_count: samples the user actually heard; defaults to all audio received for the item
+        """
         if not id:
             await self.realtime.send("response.cancel")
             return {"item": None}
@@ -655,20 +1135,47 @@ class RealtimeClient(RealtimeEventHandler):
             if item["role"] != "assistant":
                 raise Exception('Can only cancelResponse messages with role "assistant"')
             await self.realtime.send("response.cancel")
-            audio_index = next((i for i, c in enumerate(item["content"]) if c["type"] == "audio"), -1)
-            if audio_index == -1:
-                raise Exception("Could not find audio on item to cancel")
-            await self.realtime.send("conversation.item.truncate", {
-                "item_id": id,
-                "content_index": audio_index,
-                "audio_end_ms": int((sample_count / self.conversation.default_frequency) * 1000),
-            })
+            await self.truncate_audio(id, sample_count)
             return {"item": item}
 
-    async def wait_for_next_item(self):
-        event = await self.wait_for_next("conversation.item.appended")
+    async def truncate_audio(self, id, sample_count=None):
+        """
+        Truncate an assistant item's audio (and its transcript) on the server.
+        :param sample_count: samples to keep; defaults to all audio received for the item
+        """
+        item = self.conversation.get_item(id)
+        if not item:
+            raise Exception(f'Could not find item "{id}"')
+        audio_index = next((i for i, c in enumerate(item["content"]) if c["type"] == "audio"), -1)
+        if audio_index == -1:
+            raise Exception("Could not find audio on item to cancel")
+        audio = self.conversation.get_output_audio(id)
+        received = audio.end_sample if audio else 0
+        sample_count = received if sample_count is None else min(sample_count, received)
+        await self.realtime.send("conversation.item.truncate", {
+            "item_id": id,
+            "content_index": audio_index,
+            "audio_end_ms": sample_count * 1000 // self.conversation.default_frequency,
+        })
+
+    async def wait_for_next_item(self, timeout=None):
+        event = await self.wait_for_next("conversation.item.appended", timeout)
         return {"item": event["item"]}
 
-    async def wait_for_next_completed_item(self):
-        event = await self.wait_for_next("conversation.item.completed")
+    async def wait_for_next_completed_item(self, timeout=None):
+        event = await self.wait_for_next("conversation.item.completed", timeout)
         return {"item": event["item"]}
+
+    def latency_summary(self, scope="session"):
+        """
+        p50/p95/p99/max per latency interval, in milliseconds.
+        :param scope: "session" for this client, "process" for every client in this worker
+        """
+        if scope == "process":
+            return process_latencies.summary()
+        return self.timing.summary()
+
+    def dump_latencies(self, file, scope="session"):
+        """Append the retained per-turn timelines as JSON lines; returns the number of turns written."""
+        registry = process_latencies if scope == "process" else self.timing.session
+        return registry.dump_jsonl(file)
@@ -0,0 +1,86 @@
+JSON_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+}
+
+
+class StreamingArguments:
+    """
+    Tracks function-call arguments as they stream in and reports when the top-level JSON object is closed.
+    Each delta is scanned once, so the full argument string is only parsed when it is complete.
+    """
+    __slots__ = ('depth', 'in_string', 'escape', 'complete', 'invalid')
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.complete = False
+        self.invalid = False
+
+    def feed(self, delta):
+        """:return: True once the top-level object has been closed"""
+        if self.complete or self.invalid:
+            return self.complete
+        for char in delta:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.complete = True
+                    return True
+                if self.depth < 0:
+                    self.invalid = True
+                    return False
+        return False
+
+
+def _matches(schema, value):
+    expected = schema.get("type")
+    if expected in JSON_TYPES:
+        if not isinstance(value, JSON_TYPES[expected]):
+            return False
+        # bool is an int subclass but not a JSON number
+        if expected in ("integer", "number") and isinstance(value, bool):
+            return False
+    if "enum" in schema and value not in schema["enum"]:
+        return False
+    if expected == "array" and "items" in schema:
+        return all(_matches(schema["items"], entry) for entry in value)
+    if expected == "object" and "properties" in schema:
+        return validate_arguments(schema, value)
+    return True
+
+
+def validate_arguments(schema, arguments):
+    """
+    Check parsed arguments against the subset of JSON Schema used in tool definitions:
+    type, required, properties, enum, items and additionalProperties: false.
+    """
+    if not isinstance(arguments, dict):
+        return False
+    schema = schema or {}
+    properties = schema.get("properties", {})
+    if any(name not in arguments for name in schema.get("required", ())):
+        return False
+    for name, value in arguments.items():
+        if name in properties:
+            if not _matches(properties[name], value):
+                return False
+        elif schema.get("additionalProperties") is False:
+            return False
+    return True
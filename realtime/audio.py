@@ -0,0 +1,275 @@
+import binascii
+import wave
+import numpy as np
+
+
+PCM16_SAMPLE_WIDTH = 2
+DEFAULT_BLOCK_BYTES = 48000 * PCM16_SAMPLE_WIDTH  # 1s of 24kHz mono PCM16
+MAX_BLOCK_BYTES = 8 * DEFAULT_BLOCK_BYTES
+DEFAULT_INPUT_RETENTION_MS = 30000
+DEFAULT_OUTPUT_RETENTION_MS = 30000
+
+
+class PCM16Arena:
+    """
+    Append-only PCM16 store made of preallocated blocks.
+    Blocks are never resized or moved, so the memoryviews handed out by append() stay valid
+    for the lifetime of the arena. New blocks grow geometrically up to MAX_BLOCK_BYTES.
+    The blocks double as a chunk list: reading the whole audio joins them once, on demand.
+    With max_bytes set, whole blocks are evicted from the front once the limit is exceeded;
+    sample positions stay absolute (counted from the first sample ever appended).
+    """
+
+    def __init__(self, block_bytes=DEFAULT_BLOCK_BYTES, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_block_bytes = MAX_BLOCK_BYTES
+        if max_bytes is not None:
+            # Eviction works on whole blocks, so keep them small relative to the limit
+            self.max_block_bytes = max(PCM16_SAMPLE_WIDTH, max_bytes // 4)
+        self.next_block_bytes = min(block_bytes, self.max_block_bytes)
+        self.blocks = []
+        self.used = 0  # bytes used in the last block
+        self.nbytes = 0  # bytes retained
+        self.dropped = 0  # bytes evicted from the front
+
+    def __len__(self):
+        return self.nbytes
+
+    @property
+    def samples(self):
+        return self.nbytes // PCM16_SAMPLE_WIDTH
+
+    @property
+    def end_sample(self):
+        """Absolute number of samples received, including evicted ones."""
+        return (self.dropped + self.nbytes) // PCM16_SAMPLE_WIDTH
+
+    def _reserve(self, size):
+        if self.blocks and len(self.blocks[-1]) - self.used >= size:
+            return
+        if self.blocks:
+            # Trim the view of the finished block to what was written so chunks() stays exact
+            self.blocks[-1] = self.blocks[-1][:self.used]
+        capacity = max(self.next_block_bytes, size)
+        self.next_block_bytes = min(self.next_block_bytes * 2, self.max_block_bytes)
+        self.blocks.append(memoryview(bytearray(capacity)))
+        self.used = 0
+
+    def _evict(self):
+        while len(self.blocks) > 1 and self.nbytes - len(self.blocks[0]) >= self.max_bytes:
+            block = self.blocks.pop(0)
+            self.nbytes -= len(block)
+            self.dropped += len(block)
+
+    def append(self, data):
+        """
+        Copy PCM16 bytes into the arena.
+        :param data: bytes-like PCM16 audio
+        :return: memoryview over the stored copy
+        """
+        size = len(data)
+        self._reserve(size)
+        block = self.blocks[-1]
+        view = block[self.used:self.used + size]
+        view[:] = data
+        self.used += size
+        self.nbytes += size
+        if self.max_bytes is not None and self.nbytes > self.max_bytes:
+            self._evict()
+        return view
+
+    def append_base64(self, base64_string):
+        """
+        Decode a base64 audio delta into the arena.
+        :param base64_string: base64 encoded PCM16
+        :return: memoryview over the decoded audio
+        """
+        return self.append(binascii.a2b_base64(base64_string))
+
+    def truncate(self, end_sample):
+        """
+        Drop everything from absolute sample end_sample onwards (e.g. audio the user never heard).
+        Only block views are trimmed; no audio is copied.
+        """
+        keep = max(0, end_sample * PCM16_SAMPLE_WIDTH - self.dropped)
+        if keep >= self.nbytes:
+            return
+        blocks = list(self.chunks())
+        self.blocks = []
+        self.nbytes = 0
+        for block in blocks:
+            if self.nbytes + len(block) >= keep:
+                self.blocks.append(block[:keep - self.nbytes])
+                self.nbytes = keep
+                break
+            self.blocks.append(block)
+            self.nbytes += len(block)
+        # The last view is exactly full, so the next append starts a fresh block
+        self.used = len(self.blocks[-1]) if self.blocks else 0
+
+    def release(self):
+        """Drop all retained audio; end_sample keeps counting, so truncation offsets stay exact."""
+        self.dropped += self.nbytes
+        self.nbytes = 0
+        self.blocks = []
+        self.used = 0
+
+    def chunks(self):
+        """Yield memoryviews over the retained audio, in order, without copying."""
+        for block in self.blocks[:-1]:
+            yield block
+        if self.blocks:
+            yield self.blocks[-1][:self.used]
+
+    def tobytes(self):
+        return b"".join(self.chunks())
+
+    def to_array(self):
+        """Retained audio as one int16 numpy array (a single join)."""
+        return np.frombuffer(self.tobytes(), dtype=np.int16)
+
+    def to_wav(self, file, sample_rate):
+        """
+        Write the retained audio as a mono 16-bit WAV file, streaming block by block.
+        :param file: path or binary file object
+        """
+        with wave.open(file, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(PCM16_SAMPLE_WIDTH)
+            wav.setframerate(sample_rate)
+            for chunk in self.chunks():
+                wav.writeframesraw(chunk)
+
+
+class PCM16Ring:
+    """
+    Fixed-capacity PCM16 ring buffer addressed by absolute sample offset since the session started.
+    Every byte is written twice (at i % capacity and i % capacity + capacity), so any retained
+    range is contiguous and slice() can return a view instead of a copy.
+    Views alias the ring: they are only valid until the audio they cover falls out of the retention window.
+    """
+
+    def __init__(self, sample_rate, retention_ms=DEFAULT_INPUT_RETENTION_MS):
+        self.sample_rate = sample_rate
+        self.capacity = (sample_rate * retention_ms // 1000) * PCM16_SAMPLE_WIDTH
+        if self.capacity <= 0:
+            raise Exception("Input audio retention must hold at least one sample")
+        self.view = memoryview(bytearray(2 * self.capacity))
+        self.end = 0  # absolute byte offset of the next write
+        self.mark = 0  # absolute byte offset of the last take_uncommitted()
+
+    def __len__(self):
+        return min(self.end, self.capacity)
+
+    @property
+    def start(self):
+        return max(0, self.end - self.capacity)
+
+    @property
+    def start_sample(self):
+        return self.start // PCM16_SAMPLE_WIDTH
+
+    @property
+    def end_sample(self):
+        return self.end // PCM16_SAMPLE_WIDTH
+
+    @property
+    def uncommitted_bytes(self):
+        return self.end - max(self.mark, self.start)
+
+    def append(self, data):
+        data = memoryview(data).cast("B")
+        size = len(data)
+        if size > self.capacity:
+            # Only the tail survives anyway
+            self.end += size - self.capacity
+            data = data[size - self.capacity:]
+            size = self.capacity
+        capacity = self.capacity
+        pos = self.end % capacity
+        first = min(size, capacity - pos)
+        self.view[pos:pos + first] = data[:first]
+        self.view[pos + capacity:pos + capacity + first] = data[:first]
+        rest = size - first
+        if rest:
+            self.view[:rest] = data[first:]
+            self.view[capacity:capacity + rest] = data[first:]
+        self.end += size
+
+    def _view(self, start, end):
+        start = max(start, self.start)
+        end = min(end, self.end)
+        if end <= start:
+            return self.view[:0]
+        pos = start % self.capacity
+        return self.view[pos:pos + end - start]
+
+    def slice(self, start_sample, end_sample):
+        """
+        Zero-copy view of the samples in [start_sample, end_sample), clamped to what is still retained.
+        :return: memoryview over PCM16 bytes
+        """
+        return self._view(start_sample * PCM16_SAMPLE_WIDTH, end_sample * PCM16_SAMPLE_WIDTH)
+
+    def take_uncommitted(self):
+        """Return a view of the audio appended since the previous call and advance the mark."""
+        view = self._view(self.mark, self.end)
+        self.mark = self.end
+        return view
+
+
+DEFAULT_FRAME_MS = 60
+
+
+class AudioFrameCoalescer:
+    """
+    Packs arbitrarily sized PCM16 chunks into fixed-duration frames.
+    Partial audio waits in a preallocated frame buffer until it fills up or flush() is called.
+    """
+
+    def __init__(self, sample_rate, frame_ms=DEFAULT_FRAME_MS):
+        self.frame_bytes = (sample_rate * frame_ms // 1000) * PCM16_SAMPLE_WIDTH
+        if self.frame_bytes <= 0:
+            raise Exception("Audio frame must hold at least one sample")
+        self.frame = bytearray(self.frame_bytes)
+        self.used = 0
+
+    def __len__(self):
+        return self.used
+
+    def push(self, data):
+        """
+        Add audio and return the frames it completed.
+        :param data: bytes-like PCM16 audio
+        :return: list of bytes, each exactly frame_bytes long
+        """
+        data = memoryview(data).cast("B")
+        frames = []
+        offset = 0
+        size = len(data)
+        if self.used:
+            take = min(self.frame_bytes - self.used, size)
+            self.frame[self.used:self.used + take] = data[:take]
+            self.used += take
+            offset = take
+            if self.used < self.frame_bytes:
+                return frames
+            frames.append(bytes(self.frame))
+            self.used = 0
+        # Whole frames are cut straight from the input
+        while size - offset >= self.frame_bytes:
+            frames.append(bytes(data[offset:offset + self.frame_bytes]))
+            offset += self.frame_bytes
+        rest = size - offset
+        if rest:
+            self.frame[:rest] = data[offset:]
+            self.used = rest
+        return frames
+
+    def flush(self):
+        """Return the partial frame, if any, and reset."""
+        if not self.used:
+            return None
+        frame = bytes(self.frame[:self.used])
+        self.used = 0
+        return frame
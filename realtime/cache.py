@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 128
+
+
+def normalize_arguments(arguments, schema=None):
+    """Canonical JSON for a call: schema defaults filled in, keys sorted, no insignificant whitespace."""
+    properties = (schema or {}).get("properties", {})
+    normalized = {
+        name: prop["default"]
+        for name, prop in properties.items()
+        if "default" in prop and name not in arguments
+    }
+    normalized.update(arguments)
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+class ToolResultCache:
+    """
+    TTL + LRU cache of tool results, keyed by tool name and normalized arguments, with per-tool limits.
+    Concurrent identical calls share one execution (single flight); failures are never cached.
+    """
+
+    def __init__(self, default_ttl=DEFAULT_TTL, default_max_entries=DEFAULT_MAX_ENTRIES):
+        self.default_ttl = default_ttl
+        self.default_max_entries = default_max_entries
+        self.entries = {}
+        self.inflight = {}
+        self.counts = {}
+        # Bumped by invalidate() so calls already running when it happened do not store their result
+        self.generation = 0
+        self.generations = {}
+
+    def _count(self, name, metric):
+        counts = self.counts.get(name)
+        if counts is None:
+            counts = self.counts[name] = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "evictions": 0}
+        counts[metric] += 1
+
+    async def call(self, name, key, factory, ttl=None, max_entries=None):
+        """
+        Return the cached result for (name, key), or run `factory()` once for all concurrent callers.
+        :param factory: coroutine function producing the result
+        :param ttl: seconds a result stays valid
+        :param max_entries: results kept for this tool before the least recently used is dropped
+        """
+        entries = self.entries.get(name)
+        if entries is None:
+            entries = self.entries[name] = OrderedDict()
+        entry = entries.get(key)
+        if entry is not None:
+            expires, result = entry
+            if expires > time.monotonic():
+                entries.move_to_end(key)
+                self._count(name, "hits")
+                return result
+            del entries[key]
+            self._count(name, "expired")
+        task = self.inflight.get((name, key))
+        if task is None:
+            self._count(name, "misses")
+            # The call runs as its own task so a cancelled caller does not fail the others waiting on it
+            task = asyncio.create_task(factory())
+            self.inflight[(name, key)] = task
+            generation = self._generation(name)
+            task.add_done_callback(lambda done: self._store(name, key, done, ttl, max_entries, generation))
+        else:
+            self._count(name, "coalesced")
+        return await asyncio.shield(task)
+
+    def _generation(self, name):
+        return self.generation, self.generations.get(name, 0)
+
+    def _store(self, name, key, task, ttl, max_entries, generation):
+        if self.inflight.get((name, key)) is task:
+            del self.inflight[(name, key)]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if generation != self._generation(name):
+            return
+        entries = self.entries.setdefault(name, OrderedDict())
+        entries[key] = (time.monotonic() + (self.default_ttl if ttl is None else ttl), task.result())
+        entries.move_to_end(key)
+        limit = self.default_max_entries if max_entries is None else max_entries
+        while len(entries) > limit:
+            entries.popitem(last=False)
+            self._count(name, "evictions")
+
+    def invalidate(self, name=None):
+        """Drop cached results; calls already running are not stored and new calls do not join them."""
+        if name is None:
+            self.entries.clear()
+            self.inflight.clear()
+            self.generation += 1
+        else:
+            self.entries.pop(name, None)
+            for inflight_key in [k for k in self.inflight if k[0] == name]:
+                del self.inflight[inflight_key]
+            self.generations[name] = self.generations.get(name, 0) + 1
+
+    def metrics(self):
+        """Counters and current size per tool, plus the overall hit rate."""
+        tools = {
+            name: {**counts, "size": len(self.entries.get(name, ()))}
+            for name, counts in self.counts.items()
+        }
+        hits = sum(counts["hits"] + counts["coalesced"] for counts in self.counts.values())
+        lookups = hits + sum(counts["misses"] for counts in self.counts.values())
+        return {"tools": tools, "hit_rate": hits / lookups if lookups else None}
+
+
+# Shared by every session in this worker process, so identical lookups from different users hit too
+tool_results = ToolResultCache()
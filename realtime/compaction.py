@@ -0,0 +1,144 @@
+import json
+
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+
+def tool_status(output):
+    """Short status of a tool result: its status or error field, not the full payload."""
+    try:
+        value = json.loads(output or '""')
+    except ValueError:
+        return (output or '')[:200]
+    if isinstance(value, dict):
+        value = value.get('status') or value.get('error') or ''
+    return str(value)[:200]
+
+
+class CompactionPlan:
+    __slots__ = ('delete_ids', 'summary')
+
+    def __init__(self, delete_ids, summary):
+        self.delete_ids = delete_ids
+        self.summary = summary
+
+    def __repr__(self):
+        return f"CompactionPlan(delete={len(self.delete_ids)}, summary={len(self.summary or '')} chars)"
+
+
+class CompactionPolicy:
+    """
+    Decides which old conversation items to drop so the server-side context stays within budget.
+    Sizes are estimated from the item text (transcripts, arguments, tool output); tokens ~= bytes / 4.
+    The newest keep_recent_items items and the last keep_recent_tool_results tool results (with their
+    calls) are never dropped. Dropped items can be replaced by one short summary message; an earlier
+    summary is merged into the new one rather than kept next to it.
+    """
+
+    def __init__(self, max_items=40, max_tokens=8000, max_bytes=48 * 1024, keep_recent_items=6,
+                 keep_recent_tool_results=2, summarize=True, max_summary_chars=1500):
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_bytes = max_bytes
+        self.keep_recent_items = keep_recent_items
+        self.keep_recent_tool_results = keep_recent_tool_results
+        self.summarize = summarize
+        self.max_summary_chars = max_summary_chars
+
+    @staticmethod
+    def item_bytes(item):
+        size = 0
+        for value in (item.text, item.transcript, item.arguments, item.output):
+            if value:
+                size += len(value.encode('utf-8'))
+        return size
+
+    def over_budget(self, count, size):
+        return (
+            (self.max_items is not None and count > self.max_items)
+            or (self.max_bytes is not None and size > self.max_bytes)
+            or (self.max_tokens is not None and size // 4 > self.max_tokens)
+        )
+
+    @staticmethod
+    def is_summary(item):
+        return item.type == 'message' and (item.text or '').startswith(SUMMARY_PREFIX)
+
+    def _protected(self, items):
+        protected = {item.id for item in items[-self.keep_recent_items:]} if self.keep_recent_items else set()
+        protected.update(item.id for item in items if item.status == 'in_progress')
+        if self.keep_recent_tool_results:
+            outputs = [item for item in items if item.type == 'function_call_output'][-self.keep_recent_tool_results:]
+            call_ids = {item.call_id for item in outputs}
+            protected.update(item.id for item in items if item.call_id in call_ids)
+        return protected
+
+    def plan(self, items, exclude=()):
+        """
+        :param items: ConversationItems in conversation order
+        :param exclude: ids already being deleted
+        :return: CompactionPlan, or None when the conversation is within budget
+        """
+        items = [item for item in items if item.id not in exclude]
+        sizes = {item.id: self.item_bytes(item) for item in items}
+        count = len(items)
+        size = sum(sizes.values())
+        if not self.over_budget(count, size):
+            return None
+        protected = self._protected(items)
+        # Never leave half of a tool call/output pair behind
+        protected_calls = {item.call_id for item in items if item.call_id and item.id in protected}
+        protected.update(item.id for item in items if item.call_id in protected_calls)
+        summaries = [item for item in items if self.is_summary(item)] if self.summarize else []
+        summary_ids = {item.id for item in summaries}
+        if self.summarize:
+            # The new summary replaces the existing ones
+            count += 1 - len(summaries)
+            size -= sum(sizes[item.id] for item in summaries)
+        dropped = []
+        for item in items:
+            if not self.over_budget(count, size):
+                break
+            if item.id in protected or item.id in summary_ids:
+                continue
+            dropped.append(item)
+            count -= 1
+            size -= sizes[item.id]
+        if not dropped:
+            return None
+        dropped = summaries + dropped
+        call_ids = {item.call_id for item in dropped if item.call_id}
+        if call_ids:
+            dropped_ids = {item.id for item in dropped}
+            dropped = [
+                item for item in items
+                if item.id in dropped_ids or (item.call_id in call_ids and item.id not in protected)
+            ]
+        summary = self.summarize_items(dropped) if self.summarize else None
+        return CompactionPlan([item.id for item in dropped], summary)
+
+    def summarize_items(self, items):
+        """One line per dropped item; tool outputs keep only their status, never the markdown details."""
+        lines = []
+        calls = {}
+        for item in items:
+            if item.type == 'message':
+                text = (item.text or item.transcript or '').strip()
+                if text.startswith(SUMMARY_PREFIX):
+                    lines.append(text[len(SUMMARY_PREFIX):].strip())
+                elif text:
+                    lines.append(f"{item.role}: {text[:200]}")
+            elif item.type == 'function_call':
+                calls[item.call_id] = item
+            elif item.type == 'function_call_output':
+                call = calls.pop(item.call_id, None)
+                name = call.name if call else 'tool'
+                arguments = call.arguments if call else ''
+                lines.append(f"{name}({arguments}) -> {tool_status(item.output)}")
+        if not lines:
+            return None
+        summary = "\n".join(lines)
+        if len(summary) > self.max_summary_chars:
+            # Keep the most recent part, it matters most for follow-up questions
+            summary = "..." + summary[-self.max_summary_chars:]
+        return f"{SUMMARY_PREFIX}\n{summary}"
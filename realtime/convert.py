@@ -0,0 +1,148 @@
+from math import gcd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+MODEL_SAMPLE_RATE = 24000
+DEFAULT_TAPS_PER_PHASE = 16
+
+
+def float_to_int16(float32_array, out=None):
+    """
+    Converts float32 samples in [-1, 1] to int16, optionally into a preallocated array.
+    :param float32_array: numpy array of float32
+    :param out: optional int16 array of the same length
+    :return: numpy array of int16
+    """
+    scaled = np.multiply(float32_array, 32767.0, dtype=np.float32)
+    np.clip(scaled, -32768.0, 32767.0, out=scaled)
+    if out is None:
+        return scaled.astype(np.int16)
+    np.copyto(out, scaled, casting="unsafe")
+    return out
+
+
+def int16_to_float(int16_array, out=None):
+    """
+    Converts int16 samples to float32 in [-1, 1].
+    :param int16_array: numpy array of int16
+    :param out: optional float32 array of the same length
+    :return: numpy array of float32
+    """
+    return np.multiply(int16_array, 1.0 / 32768.0, out=out, dtype=np.float32)
+
+
+def downmix(interleaved, channels):
+    """
+    Averages interleaved multi-channel samples down to mono.
+    :param interleaved: 1-D numpy array with channels interleaved
+    :param channels: number of channels
+    :return: float32 mono array
+    """
+    if channels == 1:
+        return interleaved.astype(np.float32, copy=False)
+    frames = len(interleaved) // channels
+    return interleaved[:frames * channels].reshape(frames, channels).mean(axis=1, dtype=np.float32)
+
+
+def design_polyphase_filter(up, down, taps_per_phase=DEFAULT_TAPS_PER_PHASE):
+    """
+    Windowed-sinc low-pass prototype split into `up` phases.
+    :return: float32 array of shape (up, taps_per_phase), each row reversed for direct dot products
+    """
+    length = up * taps_per_phase
+    cutoff = 1.0 / max(up, down)
+    n = np.arange(length) - (length - 1) / 2.0
+    prototype = cutoff * np.sinc(cutoff * n) * np.kaiser(length, 8.0) * up
+    bank = prototype.reshape(taps_per_phase, up).T
+    return np.ascontiguousarray(bank[:, ::-1], dtype=np.float32)
+
+
+class StreamResampler:
+    """
+    Polyphase resampler for mono float32 streams.
+    Filter history and the fractional output position carry across process() calls,
+    so chunk boundaries are inaudible. All output samples of a chunk are computed in one
+    vectorized gather + row-wise dot product; work buffers are reused between calls.
+    """
+
+    def __init__(self, in_rate, out_rate=MODEL_SAMPLE_RATE, taps_per_phase=DEFAULT_TAPS_PER_PHASE):
+        divisor = gcd(in_rate, out_rate)
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps = taps_per_phase
+        self.bank = design_polyphase_filter(self.up, self.down, taps_per_phase)
+        self.history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self.position = 0  # next output position, in upsampled units relative to the next chunk
+        self.work = np.zeros(0, dtype=np.float32)
+        self.out = np.zeros(0, dtype=np.float32)
+
+    def output_length(self, input_length):
+        remaining = input_length * self.up - self.position
+        return max(0, -(-remaining // self.down))
+
+    def process(self, samples):
+        """
+        Resample one chunk.
+        :param samples: 1-D float32 array
+        :return: float32 view into an internal buffer, valid until the next call
+        """
+        size = len(samples)
+        history = self.taps - 1
+        needed = history + size
+        if len(self.work) < needed:
+            self.work = np.zeros(max(needed, 2 * len(self.work)), dtype=np.float32)
+        work = self.work[:needed]
+        work[:history] = self.history
+        work[history:] = samples
+        count = self.output_length(size)
+        if len(self.out) < count:
+            self.out = np.zeros(max(count, 2 * len(self.out)), dtype=np.float32)
+        out = self.out[:count]
+        if count:
+            positions = self.position + self.down * np.arange(count)
+            windows = sliding_window_view(work, self.taps)[positions // self.up]
+            np.einsum("nk,nk->n", windows, self.bank[positions % self.up], out=out)
+            self.position = int(positions[-1]) + self.down
+        self.position -= size * self.up
+        self.history[:] = work[needed - history:]
+        return out
+
+
+class AudioConverter:
+    """
+    Streaming conversion of raw client audio (PCM16 or float32, mono or interleaved) to mono PCM16 at out_rate.
+    Partial samples left at the end of a chunk are carried over to the next one.
+    """
+
+    def __init__(self, in_rate, out_rate=MODEL_SAMPLE_RATE, channels=1, in_format="pcm16",
+                 taps_per_phase=DEFAULT_TAPS_PER_PHASE):
+        if in_format not in ("pcm16", "float32"):
+            raise Exception(f'Unsupported input format "{in_format}"')
+        self.dtype = np.int16 if in_format == "pcm16" else np.float32
+        self.channels = channels
+        self.frame_bytes = np.dtype(self.dtype).itemsize * channels
+        self.resampler = StreamResampler(in_rate, out_rate, taps_per_phase) if in_rate != out_rate else None
+        self.carry = b""
+        self.pcm = np.zeros(0, dtype=np.int16)
+
+    def convert(self, data):
+        """
+        :param data: bytes-like audio in the input format
+        :return: bytes of mono PCM16 at out_rate
+        """
+        if self.carry:
+            data = self.carry + bytes(data)
+        usable = len(data) - len(data) % self.frame_bytes
+        self.carry = bytes(data[usable:])
+        samples = np.frombuffer(data, dtype=self.dtype, count=usable // self.dtype().itemsize)
+        if self.dtype == np.int16 and self.channels == 1 and self.resampler is None:
+            return samples.tobytes()
+        mono = downmix(samples, self.channels)
+        if self.dtype == np.int16:
+            mono = int16_to_float(mono)
+        if self.resampler:
+            mono = self.resampler.process(mono)
+        if len(self.pcm) < len(mono):
+            self.pcm = np.zeros(max(len(mono), 2 * len(self.pcm)), dtype=np.int16)
+        return float_to_int16(mono, self.pcm[:len(mono)]).tobytes()
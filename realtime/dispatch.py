@@ -0,0 +1,156 @@
+import asyncio
+import traceback
+from collections import deque
+from chainlit.logger import logger
+
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+DEFAULT_MAXSIZE = 256
+
+
+def keep_latest(previous, event):
+    """Default coalesce function: the newest event replaces the pending one."""
+    return event
+
+
+class DispatchQueue:
+    """
+    Ordered, bounded queue of events for a single event name.
+    One worker task drains it and awaits every coroutine handler per event, in order.
+    The worker exits when the queue is empty, so idle event names cost no task.
+    """
+
+    def __init__(self, name, get_handlers, on_error, maxsize=DEFAULT_MAXSIZE, policy=BLOCK, coalesce=None):
+        if policy not in POLICIES:
+            raise Exception(f'Unknown dispatch policy "{policy}", expected one of {POLICIES}')
+        self.name = name
+        self.get_handlers = get_handlers
+        self.on_error = on_error
+        self.maxsize = maxsize
+        self.policy = policy
+        self.coalesce = coalesce or keep_latest
+        self.pending = deque()
+        self.worker = None
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def __len__(self):
+        return len(self.pending)
+
+    def is_full(self):
+        return len(self.pending) >= self.maxsize
+
+    def put(self, event):
+        if self.is_full():
+            if self.policy == DROP_OLDEST:
+                self.pending.popleft()
+                self.dropped += 1
+            elif self.policy == COALESCE:
+                self.pending[-1] = self.coalesce(self.pending[-1], event)
+                self.coalesced += 1
+                self._ensure_worker()
+                return
+            # BLOCK accepts the event; producers throttle themselves with wait_for_capacity()
+        self.pending.append(event)
+        if self.is_full():
+            self.not_full.clear()
+        self._ensure_worker()
+
+    async def wait_for_capacity(self):
+        while self.is_full():
+            await self.not_full.wait()
+
+    async def join(self):
+        while self.worker is not None:
+            await asyncio.shield(self.worker)
+
+    def close(self):
+        self.pending.clear()
+        self.not_full.set()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+
+    def stats(self):
+        return {
+            "pending": len(self.pending),
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+    def _ensure_worker(self):
+        if self.worker is None:
+            self.worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self.pending:
+                event = self.pending.popleft()
+                if not self.is_full():
+                    self.not_full.set()
+                for handler in self.get_handlers():
+                    try:
+                        await handler(event)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        self.errors += 1
+                        logger.error(f'Handler for "{self.name}" failed:\n{traceback.format_exc()}')
+                        self.on_error(self.name, event, e)
+        finally:
+            if self.worker is asyncio.current_task():
+                self.worker = None
+            self.not_full.set()
+
+
+class WaiterRegistry:
+    """One-shot futures keyed by event name. A future is removed as soon as it resolves, times out or is cancelled."""
+
+    def __init__(self):
+        self.futures = {}
+
+    def __len__(self):
+        return sum(len(futures) for futures in self.futures.values())
+
+    def add(self, name):
+        future = asyncio.get_running_loop().create_future()
+        self.futures.setdefault(name, []).append(future)
+        return future
+
+    def discard(self, name, future):
+        futures = self.futures.get(name)
+        if futures and future in futures:
+            futures.remove(future)
+            if not futures:
+                del self.futures[name]
+
+    def resolve(self, name, event):
+        for future in self.futures.pop(name, ()):
+            if not future.done():
+                future.set_result(event)
+
+    def cancel_all(self):
+        futures, self.futures = self.futures, {}
+        for pending in futures.values():
+            for future in pending:
+                future.cancel()
+
+    async def wait(self, name, timeout=None):
+        """
+        Wait for the next `name` event.
+        :raises asyncio.TimeoutError: if timeout (seconds) elapses first
+        :raises asyncio.CancelledError: if the registry is cancelled, e.g. on disconnect
+        """
+        future = self.add(name)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.discard(name, future)
@@ -0,0 +1,140 @@
+import json
+import logging
+import queue
+import threading
+from collections import Counter, deque
+
+
+class JournalWriter:
+    """
+    Single background thread shared by every journal in the process, so sessions do not each hold a thread.
+    Entries are (journal, entry) pairs; each journal formats and logs its own entries on this thread.
+    """
+
+    def __init__(self, max_pending=8192):
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def put(self, journal, entry):
+        """:return: False when the queue is full and the entry was dropped"""
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="conversation-journal", daemon=True)
+                    self.thread.start()
+        try:
+            self.pending.put_nowait((journal, entry))
+            return True
+        except queue.Full:
+            return False
+
+    def flush(self, timeout=1.0):
+        """Wait until the entries queued so far have been written."""
+        if self.thread is None:
+            return
+        done = threading.Event()
+        try:
+            self.pending.put((None, done), timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _run(self):
+        while True:
+            journal, entry = self.pending.get()
+            if journal is None:
+                entry.set()
+                continue
+            journal._write(entry)
+
+
+# Shared by every conversation in this worker process
+journal_writer = JournalWriter()
+
+
+class ConversationJournal:
+    """
+    Incremental conversation log.
+    record() only captures references to the fields of the one item that changed; formatting,
+    JSON parsing of tool outputs and the logging call itself happen on the shared journal_writer thread.
+    """
+
+    def __init__(self, logger=None, recent=20, writer=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.writer = writer or journal_writer
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.dropped = 0
+        self.written = 0
+        self.counts = Counter()
+        self.recent = deque(maxlen=recent)
+
+    def record(self, action, item):
+        """
+        Queue one journal entry.
+        :param action: what happened to the item, e.g. "created", "completed", "deleted"
+        :param item: ConversationItem; only its current field values are captured
+        """
+        if item is None:
+            return
+        self.sequence += 1
+        entry = (
+            self.sequence, action, item.id, item.type or 'unknown', item.role,
+            item.text, item.transcript, item.name, item.arguments, item.output,
+        )
+        if not self.writer.put(self, entry):
+            self.dropped += 1
+
+    def _write(self, entry):
+        try:
+            line = self._format(entry)
+            with self.lock:
+                self.counts[(entry[1], entry[3])] += 1
+                self.recent.append(line)
+            self.logger.info(line)
+        except Exception:
+            self.logger.exception("Failed to write conversation journal entry")
+        finally:
+            with self.lock:
+                self.written += 1
+
+    def _format(self, entry):
+        sequence, action, item_id, item_type, role, text, transcript, tool_name, arguments, output = entry
+        header = f"#{sequence} {action} {item_type} {item_id}"
+        if item_type == 'message':
+            lines = [f"{header} from {role or 'unknown'}"]
+            if transcript:
+                lines.append(f"Transcript: {transcript}")
+            if text and text != transcript:
+                lines.append(f"Text: {text}")
+        elif item_type == 'function_call':
+            lines = [f"{header} tool {tool_name}", f"Arguments: {arguments}"]
+        elif item_type == 'function_call_output':
+            lines = [header]
+            try:
+                output_json = json.loads(output or '{}')
+                if isinstance(output_json, str):
+                    lines.append(f"Status: {output_json}")
+                else:
+                    lines.append(f"Full Output:\n{json.dumps(output_json, indent=2)}")
+            except (TypeError, ValueError):
+                lines.append(f"Output: {output}")
+        else:
+            lines = [header]
+        return "\n".join(lines)
+
+    def summary(self):
+        """Counts per (action, item type) and the most recent formatted entries."""
+        with self.lock:
+            return {
+                "entries": self.sequence,
+                "dropped": self.dropped,
+                "pending": self.sequence - self.dropped - self.written,
+                "counts": {f"{action}:{item_type}": count for (action, item_type), count in self.counts.items()},
+                "recent": list(self.recent),
+            }
+
+    def close(self, timeout=1.0):
+        """Wait for this journal's queued entries to be written; the shared thread keeps running."""
+        self.writer.flush(timeout)
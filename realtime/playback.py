@@ -0,0 +1,206 @@
+import asyncio
+import time
+import traceback
+from collections import OrderedDict, deque
+from chainlit.logger import logger
+from .audio import AudioFrameCoalescer, PCM16_SAMPLE_WIDTH
+from .convert import MODEL_SAMPLE_RATE
+
+DOWNLINK_FRAME_MS = 100
+DOWNLINK_LEAD_MS = 300
+DOWNLINK_SPEED = 1.05
+
+
+class PlaybackTracker:
+    """
+    Estimates how much of each assistant audio item the user has heard.
+    Forwarded audio is assumed to play back in real time, item after item, from the moment it is
+    forwarded; a player that reports its position through played() overrides the estimate.
+    Positions are in samples at the model rate.
+    """
+
+    def __init__(self, sample_rate=MODEL_SAMPLE_RATE, max_items=32):
+        self.sample_rate = sample_rate
+        self.max_items = max_items
+        # item_id -> [forwarded samples, playback start (monotonic), reported played samples or None]
+        self.items = OrderedDict()
+        self.item_id = None
+        self.playing_until = 0.0
+
+    def forwarded(self, item_id, samples):
+        """Record `samples` more samples of `item_id` handed to the player."""
+        now = time.monotonic()
+        entry = self.items.get(item_id)
+        if entry is None:
+            entry = self.items[item_id] = [0, max(now, self.playing_until), None]
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+        entry[0] += samples
+        self.item_id = item_id
+        self.playing_until = max(self.playing_until, now) + samples / self.sample_rate
+
+    def played(self, item_id, samples):
+        """Playback position reported by the player; takes precedence over the wall-clock estimate."""
+        entry = self.items.get(item_id)
+        if entry is not None:
+            entry[2] = min(samples, entry[0])
+
+    def position(self, item_id=None):
+        """Samples of the item heard so far (defaults to the item forwarded last)."""
+        entry = self.items.get(item_id or self.item_id)
+        if entry is None:
+            return 0
+        forwarded, started, reported = entry
+        if reported is not None:
+            return reported
+        elapsed = time.monotonic() - started
+        return max(0, min(forwarded, int(elapsed * self.sample_rate)))
+
+    def is_playing(self):
+        return self.item_id is not None and time.monotonic() < self.playing_until
+
+    def interrupt(self):
+        """
+        Playback was cut off: freeze the current item at its position and forget queued audio.
+        :return: (item_id, played samples), or (None, 0) when nothing was forwarded
+        """
+        item_id = self.item_id
+        if item_id is None:
+            return None, 0
+        played = self.position(item_id)
+        self.items[item_id][2] = played
+        self.item_id = None
+        self.playing_until = 0.0
+        return item_id, played
+
+    def clear(self):
+        self.items.clear()
+        self.item_id = None
+        self.playing_until = 0.0
+
+
+class AudioDownlink:
+    """
+    Per-session stage between the assistant's audio deltas and the player.
+    Deltas are coalesced into fixed-duration chunks per item and handed to `send` at a steady pace, slightly
+    faster than real time, keeping about `lead_ms` of audio buffered ahead of the player. Chunks are reported
+    to `playback` when they are sent, so the tracker only counts audio the player actually received.
+    """
+
+    def __init__(self, send, sample_rate=MODEL_SAMPLE_RATE, frame_ms=DOWNLINK_FRAME_MS, lead_ms=DOWNLINK_LEAD_MS,
+                 speed=DOWNLINK_SPEED, playback=None):
+        """
+        :param send: coroutine function called with each PCM16 chunk (bytes at `sample_rate`)
+        :param speed: pacing relative to real time; above 1 so network jitter does not starve the player
+        :param playback: optional PlaybackTracker to feed with the samples sent
+        """
+        self.send = send
+        self.sample_rate = sample_rate
+        self.frame_seconds = frame_ms / 1000
+        self.lead = lead_ms / 1000
+        self.speed = speed
+        self.playback = playback
+        self.coalescer = AudioFrameCoalescer(sample_rate, frame_ms)
+        self.frames = deque()  # (item_id, chunk)
+        self.item_id = None
+        # Items cut off by the last interrupt; late deltas for them are dropped
+        self.interrupted = set()
+        self.wakeup = asyncio.Event()
+        # Loop time by which the audio sent so far is due, at the paced rate
+        self.clock = 0.0
+        self.task = None
+        self.deltas = 0
+        self.chunks = 0
+        self.sent_samples = 0
+        self.dropped_samples = 0
+
+    def start(self):
+        """Start the sender; call it from the session's context, the task inherits it."""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def push(self, item_id, audio):
+        """Queue a PCM16 delta of `item_id`; completed chunks are sent in order by the running task."""
+        if item_id in self.interrupted:
+            return
+        if item_id != self.item_id:
+            self.flush()
+            self.item_id = item_id
+        self.deltas += 1
+        for frame in self.coalescer.push(audio):
+            self.frames.append((item_id, frame))
+        self.wakeup.set()
+        self.start()
+
+    def flush(self):
+        """Queue the partial chunk of the current item, e.g. once the item is done."""
+        frame = self.coalescer.flush()
+        if frame:
+            self.frames.append((self.item_id, frame))
+            self.wakeup.set()
+
+    def interrupt(self):
+        """
+        Drop everything not yet sent, so playback stops at what the player already has.
+        :return: samples dropped
+        """
+        dropped = sum(len(frame) for _, frame in self.frames) + len(self.coalescer)
+        self.interrupted = {item_id for item_id, _ in self.frames}
+        if self.item_id is not None:
+            self.interrupted.add(self.item_id)
+        self.frames.clear()
+        self.coalescer.flush()
+        self.item_id = None
+        self.clock = 0.0
+        self.dropped_samples += dropped // PCM16_SAMPLE_WIDTH
+        return dropped // PCM16_SAMPLE_WIDTH
+
+    def close(self):
+        self.interrupt()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def metrics(self):
+        return {
+            "deltas": self.deltas,
+            "chunks": self.chunks,
+            "sent_samples": self.sent_samples,
+            "dropped_samples": self.dropped_samples,
+            "queued_samples": (sum(len(frame) for _, frame in self.frames) + len(self.coalescer)) // PCM16_SAMPLE_WIDTH,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.frames:
+                self.wakeup.clear()
+                # A partial chunk goes out once no more audio has arrived for a chunk's duration
+                timeout = self.frame_seconds if len(self.coalescer) else None
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    self.flush()
+                continue
+            now = loop.time()
+            if self.clock < now:
+                # The player has run dry (or was interrupted): start a new burst of `lead` audio
+                self.clock = now
+            delay = self.clock - self.lead - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                # An interrupt may have dropped the chunk while waiting
+                continue
+            item_id, frame = self.frames.popleft()
+            samples = len(frame) // PCM16_SAMPLE_WIDTH
+            self.clock += samples / (self.sample_rate * self.speed)
+            self.chunks += 1
+            self.sent_samples += samples
+            if self.playback is not None:
+                self.playback.forwarded(item_id, samples)
+            try:
+                await self.send(frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.error(f"Failed to send audio chunk:\n{traceback.format_exc()}")
@@ -0,0 +1,163 @@
+import asyncio
+import time
+import traceback
+from collections import deque
+from chainlit.logger import logger
+
+from . import RealtimeAPI
+from .timing import _pick
+
+
+class RealtimeConnectionPool:
+    """
+    Keeps warm Realtime API connections for this worker and hands them to clients on audio start.
+    A connection handed to a client belongs to it: release() keeps it open across push-to-talk turns
+    and only disconnects once the client has been idle for idle_timeout seconds.
+    """
+
+    def __init__(self, size=2, idle_timeout=120, max_age=20 * 60, session=None, api_factory=RealtimeAPI,
+                 maintain_interval=30):
+        """
+        :param size: number of warm connections to keep ready
+        :param idle_timeout: seconds a released client stays connected before it is closed
+        :param max_age: seconds after which a warm connection is discarded (the service expires sessions)
+        :param session: optional session config sent as session.update while warming (see configure)
+        :param maintain_interval: seconds between checks that close aged or dead warm connections
+        """
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self.session = session
+        self.api_factory = api_factory
+        self.warm = deque()  # (connected_at, RealtimeAPI)
+        self.maintain_interval = maintain_interval
+        self.filling = None
+        self.maintaining = None
+        self.idle_timers = {}
+        self.hits = 0
+        self.misses = 0
+        self.reuses = 0
+        self.connect_times = deque(maxlen=256)
+
+    def configure(self, session):
+        """
+        Session config for connections warmed from now on, normally RealtimeClient.session_payload().
+        A client whose config matches skips the session.update round trip on attach.
+        """
+        self.session = session
+
+    def start(self):
+        """Start (or top up) warm connections in the background."""
+        if self.filling is None or self.filling.done():
+            self.filling = asyncio.create_task(self._fill())
+        if self.maintaining is None or self.maintaining.done():
+            self.maintaining = asyncio.create_task(self._maintain())
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.maintain_interval)
+            await self._prune()
+            self.start()
+
+    async def _prune(self):
+        """Close warm connections that died or are older than max_age."""
+        now = time.monotonic()
+        usable = deque()
+        while self.warm:
+            connected_at, api = self.warm.popleft()
+            if api.is_alive() and now - connected_at < self.max_age:
+                usable.append((connected_at, api))
+            else:
+                await api.disconnect()
+        self.warm.extend(usable)
+
+    async def _fill(self):
+        while len(self.warm) < self.size:
+            try:
+                api = await self._open()
+            except Exception:
+                logger.error(f"Failed to warm realtime connection:\n{traceback.format_exc()}")
+                return
+            self.warm.append((time.monotonic(), api))
+
+    async def _open(self):
+        started = time.perf_counter()
+        api = self.api_factory()
+        await api.connect()
+        if self.session:
+            await api.update_session(self.session)
+        self.connect_times.append(time.perf_counter() - started)
+        return api
+
+    async def acquire(self):
+        """Take a warm connection, or dial a new one if none is usable."""
+        now = time.monotonic()
+        while self.warm:
+            connected_at, api = self.warm.popleft()
+            if api.is_alive() and now - connected_at < self.max_age:
+                self.hits += 1
+                self.start()
+                return api
+            await api.disconnect()
+        self.misses += 1
+        api = await self._open()
+        self.start()
+        return api
+
+    async def attach(self, client):
+        """Make sure the client is connected, reusing its kept-alive connection when possible."""
+        timer = self.idle_timers.pop(client, None)
+        if timer:
+            timer.cancel()
+        if client.is_connected():
+            if client.realtime.is_alive():
+                self.reuses += 1
+                return client
+            await client.disconnect()
+        await client.connect(realtime=await self.acquire(), resume=True)
+        return client
+
+    def release(self, client):
+        """Keep the client connected until it has been idle for idle_timeout seconds."""
+        timer = self.idle_timers.pop(client, None)
+        if timer:
+            timer.cancel()
+        if client.is_connected():
+            self.idle_timers[client] = asyncio.create_task(self._expire(client))
+
+    async def _expire(self, client):
+        await asyncio.sleep(self.idle_timeout)
+        self.idle_timers.pop(client, None)
+        if client.is_connected():
+            await client.disconnect()
+
+    async def detach(self, client):
+        """Disconnect the client now, e.g. when its chat ends."""
+        timer = self.idle_timers.pop(client, None)
+        if timer:
+            timer.cancel()
+        if client.is_connected():
+            await client.disconnect()
+
+    async def close(self):
+        if self.filling:
+            self.filling.cancel()
+        if self.maintaining:
+            self.maintaining.cancel()
+        for timer in self.idle_timers.values():
+            timer.cancel()
+        self.idle_timers = {}
+        while self.warm:
+            _, api = self.warm.popleft()
+            await api.disconnect()
+
+    def metrics(self):
+        connect_ms = sorted(t * 1000 for t in self.connect_times)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reuses": self.reuses,
+            "warm": len(self.warm),
+            "connect_ms_avg": sum(connect_ms) / len(connect_ms) if connect_ms else None,
+            "connect_ms_p95": _pick(connect_ms, 95) if connect_ms else None,
+        }
@@ -0,0 +1,94 @@
+import base64
+import binascii
+import json
+import struct
+import time
+
+
+MAGIC = b"RTREC1\n"
+CLIENT = 0
+SERVER = 1
+# direction, seconds since the recording started, JSON length, raw audio length
+RECORD_HEADER = struct.Struct("<BdII")
+
+# Event fields that carry base64 PCM16; they are stored as raw bytes after the JSON
+AUDIO_FIELDS = {
+    "input_audio_buffer.append": "audio",
+    "response.audio.delta": "delta",
+}
+
+
+class SessionRecorder:
+    """
+    Append-only recording of the events of one realtime session.
+    Each record is a fixed header, the event as compact JSON without its audio, then the audio as raw PCM16.
+    """
+
+    def __init__(self, file):
+        """:param file: path or binary file object opened for writing"""
+        self.own_file = isinstance(file, str)
+        self.file = open(file, "ab") if self.own_file else file
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.started = time.monotonic()
+        self.records = 0
+        self.audio_bytes = 0
+
+    def record(self, direction, event):
+        audio = b""
+        field = AUDIO_FIELDS.get(event.get("type"))
+        if field and isinstance(event.get(field), str):
+            try:
+                audio = base64.b64decode(event[field])
+                event = {key: value for key, value in event.items() if key != field}
+                event["_audio"] = field
+            except (binascii.Error, ValueError):
+                audio = b""
+        payload = json.dumps(event, separators=(",", ":")).encode("utf-8")
+        self.file.write(RECORD_HEADER.pack(direction, time.monotonic() - self.started, len(payload), len(audio)))
+        self.file.write(payload)
+        if audio:
+            self.file.write(audio)
+        self.records += 1
+        self.audio_bytes += len(audio)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.flush()
+        if self.own_file:
+            self.file.close()
+        self.file = None
+
+
+def read_recording(file):
+    """
+    Iterate over a recording.
+    :param file: path or binary file object
+    :return: generator of (direction, seconds since start, event) with audio restored as base64
+    """
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            yield from read_recording(f)
+        return
+    if file.read(len(MAGIC)) != MAGIC:
+        raise Exception("Not a realtime session recording")
+    while True:
+        header = file.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            # A recording cut off mid-record (e.g. the process died) ends at the last complete event
+            return
+        direction, timestamp, payload_size, audio_size = RECORD_HEADER.unpack(header)
+        payload = file.read(payload_size)
+        audio = file.read(audio_size)
+        if len(payload) < payload_size or len(audio) < audio_size:
+            return
+        event = json.loads(payload)
+        field = event.pop("_audio", None)
+        if field:
+            event[field] = base64.b64encode(audio).decode("ascii")
+        yield direction, timestamp, event
+
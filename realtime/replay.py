@@ -0,0 +1,115 @@
+import asyncio
+import base64
+import json
+import time
+from collections import Counter
+from . import RealtimeAPI, RealtimeClient
+from .recording import CLIENT, read_recording
+
+
+class ReplayRealtimeAPI(RealtimeAPI):
+    """
+    RealtimeAPI whose server is a recording made with RealtimeAPI.start_recording.
+    Server events go through the normal dispatch path at the recorded pace (scaled by `speed`, 0 for as fast
+    as possible); events the client sends are collected in `sent` instead of being written to a socket.
+    connect() only opens the client side, start_replay() begins feeding events once handlers are attached.
+    Recorded microphone audio is appended to `input_audio` (the client's input ring) at the point it was sent,
+    so speech_stopped slices the same audio as in the live session.
+    """
+
+    def __init__(self, recording, speed=1.0, **kwargs):
+        super().__init__(url="replay://", **kwargs)
+        self.recording = recording
+        self.speed = speed
+        self.connected = False
+        self.sent = []
+        self.recorded_client_events = []
+        self.server_events = 0
+        self.input_audio = None
+
+    def is_connected(self):
+        return self.connected
+
+    async def connect(self):
+        if self.is_connected():
+            raise Exception("Already connected")
+        self.connected = True
+        self.send_queue = asyncio.Queue(maxsize=self.send_queue_size)
+        self.writer = asyncio.create_task(self._send_messages())
+
+    def start_replay(self):
+        self.receiver = asyncio.create_task(self._replay())
+        return self.receiver
+
+    async def _send_messages(self):
+        while True:
+            message = await self.send_queue.get()
+            if message is None:
+                break
+            self.sent.append(json.loads(message))
+
+    async def _replay(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for direction, timestamp, event in read_recording(self.recording):
+            if direction == CLIENT:
+                self.recorded_client_events.append(event)
+                if event["type"] == "input_audio_buffer.append" and self.input_audio is not None:
+                    self.input_audio.append(base64.b64decode(event["audio"]))
+                continue
+            if self.speed > 0:
+                delay = started + timestamp / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self.server_events += 1
+            await self.handle_server_event(event)
+
+    async def disconnect(self):
+        if not self.connected:
+            return
+        if not self.writer.done():
+            await self.flush_input_audio()
+            await self.send_queue.put(None)
+            await self.writer
+        if self.receiver:
+            self.receiver.cancel()
+        self.connected = False
+        self.session = None
+        self.cancel_waiters()
+
+
+async def replay(recording, client=None, speed=1.0):
+    """
+    Run a recorded session through a RealtimeClient and compare what it sent with the recording.
+    :param client: RealtimeClient with the tools/handlers under test; a bare one is created if omitted
+    :return: dict with elapsed time, event counts, client event types sent vs recorded and latency percentiles
+    """
+    client = client or RealtimeClient(system_prompt="", url="replay://")
+    api = ReplayRealtimeAPI(recording, speed)
+    started = time.perf_counter()
+    await api.connect()
+    await client.connect(realtime=api)
+    api.input_audio = client.input_audio_buffer
+    await api.start_replay()
+    await api.join_dispatch_queues()
+    await client.join_dispatch_queues()
+    # Let tool calls started by the last response.done post their outputs
+    await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    await client.disconnect()
+    sent = Counter(event["type"] for event in api.sent)
+    recorded = Counter(event["type"] for event in api.recorded_client_events)
+    return {
+        "elapsed_s": elapsed,
+        "server_events": api.server_events,
+        "server_events_per_s": api.server_events / elapsed if elapsed else None,
+        "client_events_sent": dict(sent),
+        "client_events_recorded": dict(recorded),
+        # Audio appends come from the user's microphone and are not reproduced by a replay
+        "client_event_mismatches": {
+            event_type: {"sent": sent[event_type], "recorded": recorded[event_type]}
+            for event_type in sent.keys() | recorded.keys()
+            if event_type != "input_audio_buffer.append" and sent[event_type] != recorded[event_type]
+        },
+        "latency": client.latency_summary(),
+    }
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import traceback
+from chainlit.logger import logger
+from .arguments import StreamingArguments, validate_arguments
+from .cache import normalize_arguments, tool_results
+
+
+DEFAULT_TOOL_TIMEOUT = 30
+
+# Client-side settings that may appear in a tool definition; they are never sent to the server
+CLIENT_TOOL_KEYS = ("timeout", "max_concurrency", "read_only", "cache")
+
+
+def server_definition(definition):
+    """Tool definition without the client-side settings, as sent in session.update."""
+    return {key: value for key, value in definition.items() if key not in CLIENT_TOOL_KEYS}
+
+
+class ToolScheduler:
+    """
+    Runs the function calls of a response concurrently.
+    Each call starts as soon as its function_call item is done; collect() waits for every call of
+    the response so the outputs can be posted together, followed by a single response.create.
+    A definition may set "timeout" (seconds) and "max_concurrency" (calls of that tool running at once).
+    Tools marked "read_only" may start speculatively, as soon as their streamed arguments form a complete
+    object that validates against the tool's parameters; tools with side effects never do.
+    Results of tools with a "cache" setting (True, or {"ttl": seconds, "max_entries": n}) are shared through
+    the result cache. The tool's render function, if any, runs in collect() for every call whose result is
+    kept, cached or not, so a discarded speculative result is never shown.
+    """
+
+    def __init__(self, get_tool, default_timeout=DEFAULT_TOOL_TIMEOUT, cache=tool_results):
+        """:param get_tool: name -> {"definition": ..., "handler": ...} or None, called when a call starts"""
+        self.get_tool = get_tool
+        self.default_timeout = default_timeout
+        self.cache = cache
+        self.pending = {}
+        self.semaphores = {}
+        self.streams = {}
+        self.speculative = {}
+        self.speculation = {"started": 0, "used": 0, "discarded": 0}
+
+    def feed_arguments(self, item, delta, response_id=None):
+        """
+        Follow a function_call_arguments.delta; starts a read-only tool once its arguments are complete and valid.
+        :param item: the function_call ConversationItem, after the delta was appended
+        :param response_id: response the call belongs to, so discard_speculative() can drop it if never submitted
+        :return: True if a speculative call was started
+        """
+        tool_config = self.get_tool(item.name)
+        if not tool_config or not tool_config["definition"].get("read_only"):
+            return False
+        stream = self.streams.get(item.call_id)
+        if stream is None:
+            stream = self.streams[item.call_id] = (response_id, StreamingArguments())
+        if not stream[1].feed(delta):
+            return False
+        del self.streams[item.call_id]
+        try:
+            arguments = json.loads(item.arguments)
+        except ValueError:
+            return False
+        if not validate_arguments(tool_config["definition"].get("parameters"), arguments):
+            return False
+        task = asyncio.create_task(self._invoke(item.name, tool_config, arguments))
+        self.speculative[item.call_id] = (response_id, arguments, task)
+        self.speculation["started"] += 1
+        return True
+
+    def submit(self, response_id, tool):
+        """
+        Start one function call in the background, or adopt its speculative call if the final arguments match.
+        :param response_id: id of the response the function_call item belongs to
+        :param tool: {"name", "call_id", "arguments"}
+        """
+        self.streams.pop(tool["call_id"], None)
+        task = self._adopt_speculative(tool)
+        if task is None:
+            task = asyncio.create_task(self._run(tool))
+        self.pending.setdefault(response_id, []).append((tool, task))
+        return task
+
+    def _adopt_speculative(self, tool):
+        speculative = self.speculative.pop(tool["call_id"], None)
+        if speculative is None:
+            return None
+        _, arguments, task = speculative
+        try:
+            final = json.loads(tool["arguments"] or "{}")
+        except ValueError:
+            final = None
+        if final == arguments:
+            self.speculation["used"] += 1
+            return task
+        task.cancel()
+        self.speculation["discarded"] += 1
+        return None
+
+    def discard_speculative(self, response_id):
+        """Cancel the speculative calls of a finished response that never got their output_item.done."""
+        for call_id, (call_response_id, _, task) in list(self.speculative.items()):
+            if call_response_id == response_id:
+                del self.speculative[call_id]
+                task.cancel()
+                self.speculation["discarded"] += 1
+        for call_id, (call_response_id, _) in list(self.streams.items()):
+            if call_response_id == response_id:
+                del self.streams[call_id]
+
+    def has_pending(self, response_id):
+        return response_id in self.pending
+
+    async def collect(self, response_id):
+        """
+        Wait for every call started for `response_id` and render the results.
+        :return: list of (tool, output JSON string), in the order the calls were emitted
+        """
+        calls = self.pending.pop(response_id, None)
+        if not calls:
+            return []
+        results = await asyncio.gather(*(task for _, task in calls))
+        for render in (render for _, render in results if render):
+            try:
+                await render()
+            except Exception:
+                logger.error(traceback.format_exc())
+        return [(tool, output) for (tool, _), (output, _) in zip(calls, results)]
+
+    def _semaphore(self, name, definition):
+        limit = definition.get("max_concurrency")
+        if not limit:
+            return None
+        semaphore = self.semaphores.get(name)
+        if semaphore is None:
+            semaphore = self.semaphores[name] = asyncio.Semaphore(limit)
+        return semaphore
+
+    async def _run(self, tool):
+        name = tool["name"]
+        try:
+            tool_config = self.get_tool(name)
+            if not tool_config:
+                raise Exception(f'Tool "{name}" has not been added')
+            arguments = json.loads(tool["arguments"] or "{}")
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return json.dumps({"error": str(e)}), None
+        return await self._invoke(name, tool_config, arguments)
+
+    async def _invoke(self, name, tool_config, arguments):
+        """:return: (output JSON string, render coroutine function or None)"""
+        try:
+            definition = tool_config["definition"]
+            cache = definition.get("cache")
+            if cache and self.cache is not None:
+                settings = cache if isinstance(cache, dict) else {}
+                result = await self.cache.call(
+                    name,
+                    normalize_arguments(arguments, definition.get("parameters")),
+                    lambda: self._call_handler(name, tool_config, arguments),
+                    ttl=settings.get("ttl"),
+                    max_entries=settings.get("max_entries"),
+                )
+            else:
+                result = await self._call_handler(name, tool_config, arguments)
+            render = tool_config.get("render")
+            if render:
+                return json.dumps(result), lambda: render(result, **arguments)
+            return json.dumps(result), None
+        except asyncio.TimeoutError:
+            logger.error(f'Tool "{name}" timed out')
+            return json.dumps({"error": f'Tool "{name}" timed out'}), None
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return json.dumps({"error": str(e)}), None
+
+    async def _call_handler(self, name, tool_config, arguments):
+        definition = tool_config["definition"]
+        timeout = definition.get("timeout", self.default_timeout)
+        semaphore = self._semaphore(name, definition)
+        if semaphore is None:
+            return await asyncio.wait_for(tool_config["handler"](**arguments), timeout)
+        async with semaphore:
+            return await asyncio.wait_for(tool_config["handler"](**arguments), timeout)
+
+    def cancel_all(self):
+        for calls in self.pending.values():
+            for _, task in calls:
+                task.cancel()
+        for _, _, task in self.speculative.values():
+            task.cancel()
+        self.pending = {}
+        self.speculative = {}
+        self.streams = {}
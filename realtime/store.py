@@ -0,0 +1,178 @@
+ITEM_FIELDS = ('id', 'object', 'type', 'status', 'role', 'content', 'call_id', 'name', 'arguments', 'output')
+
+
+class TextBuilder:
+    """
+    Append-only string built from streamed deltas.
+    append() is O(1); the chunks are joined only when the value is read, and the result is cached.
+    """
+    __slots__ = ('chunks', 'length')
+
+    def __init__(self, value=''):
+        self.chunks = [value] if value else []
+        self.length = len(value)
+
+    def append(self, delta):
+        if delta:
+            self.chunks.append(delta)
+            self.length += len(delta)
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        chunks = self.chunks
+        if len(chunks) > 1:
+            chunks[:] = [''.join(chunks)]
+        return chunks[0] if chunks else ''
+
+
+class FormattedView:
+    """
+    Dict-style view over an item's client-side fields ('audio', 'text', 'transcript', 'tool', 'output').
+    Nothing is stored here, so there is no second copy of the item's text.
+    """
+    __slots__ = ('item',)
+
+    def __init__(self, item):
+        self.item = item
+
+    def keys(self):
+        keys = ['audio', 'text', 'transcript']
+        if self.item.type == 'function_call':
+            keys.append('tool')
+        elif self.item.type == 'function_call_output':
+            keys.append('output')
+        return keys
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __getitem__(self, key):
+        item = self.item
+        if key == 'audio':
+            return item.audio
+        if key == 'text':
+            return item.text
+        if key == 'transcript':
+            return item.transcript
+        if key == 'tool' and item.type == 'function_call':
+            return {'type': 'function', 'name': item.name, 'call_id': item.call_id, 'arguments': item.arguments}
+        if key == 'output' and item.type == 'function_call_output':
+            return item.output
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in ('audio', 'text', 'transcript', 'output'):
+            raise KeyError(key)
+        setattr(self.item, key, value)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class ConversationItem:
+    """
+    Slotted conversation item. Supports the dict-style access (item['status'], item['formatted']['transcript'])
+    that handlers already use, without a per-item __dict__ or a nested 'formatted' dict.
+    """
+    __slots__ = tuple(f for f in ITEM_FIELDS if f != 'arguments') + ('audio', '_text', '_transcript', '_arguments')
+
+    def __init__(self, item):
+        for field in ITEM_FIELDS:
+            setattr(self, field, item.get(field))
+        if self.content is not None:
+            self.content = list(self.content)
+        self.audio = []
+        self._text = TextBuilder()
+        self._transcript = TextBuilder()
+
+    # text, transcript and arguments grow by delta; they are only joined into a str when read
+
+    @property
+    def text(self):
+        return str(self._text)
+
+    @text.setter
+    def text(self, value):
+        self._text = TextBuilder(value)
+
+    @property
+    def transcript(self):
+        return str(self._transcript)
+
+    @transcript.setter
+    def transcript(self, value):
+        self._transcript = TextBuilder(value)
+
+    @property
+    def arguments(self):
+        return None if self._arguments is None else str(self._arguments)
+
+    @arguments.setter
+    def arguments(self, value):
+        self._arguments = None if value is None else TextBuilder(value)
+
+    def append_text(self, delta):
+        self._text.append(delta)
+
+    def append_transcript(self, delta):
+        self._transcript.append(delta)
+
+    def append_arguments(self, delta):
+        self._arguments.append(delta)
+
+    @property
+    def formatted(self):
+        return FormattedView(self)
+
+    def __getitem__(self, key):
+        if key == 'formatted':
+            return FormattedView(self)
+        if key in ITEM_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in ITEM_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key == 'formatted' or (key in ITEM_FIELDS and getattr(self, key) is not None)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """Plain dict in the server's item shape, e.g. for export."""
+        return {field: getattr(self, field) for field in ITEM_FIELDS if getattr(self, field) is not None}
+
+    def __repr__(self):
+        return f"ConversationItem(id={self.id!r}, type={self.type!r}, role={self.role!r}, status={self.status!r})"
+
+
+class ResponseRecord:
+    """Slotted response.created record; `output` holds the ids of the response's items."""
+    __slots__ = ('id', 'status', 'output')
+
+    def __init__(self, response):
+        self.id = response['id']
+        self.status = response.get('status')
+        self.output = list(response.get('output') or ())
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
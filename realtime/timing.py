@@ -0,0 +1,150 @@
+import json
+import time
+from collections import deque
+
+
+# (interval name, from point, to point)
+INTERVALS = (
+    ("speech_to_response", "speech_stopped", "response_created"),
+    ("speech_to_first_audio", "speech_stopped", "first_audio"),
+    ("response_to_first_audio", "response_created", "first_audio"),
+    ("arguments_to_tool_start", "arguments_done", "tool_start"),
+    # How much earlier a speculative call started than the streamed arguments finished
+    ("speculation_lead", "speculative_tool_start", "arguments_done"),
+    ("tool", "tool_start", "tool_end"),
+    ("tool_to_followup", "tool_end", "followup_create"),
+    ("followup_to_first_audio", "followup_create", "followup_first_audio"),
+    ("turn", "start", "response_done"),
+)
+
+
+def _pick(ordered, p):
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class LatencyHistogram:
+    """Keeps the most recent samples (seconds) and answers percentile queries on demand."""
+
+    def __init__(self, max_samples=2048):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def percentile(self, p):
+        if not self.samples:
+            return None
+        return _pick(sorted(self.samples), p)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "p50_ms": _pick(ordered, 50) * 1000,
+            "p95_ms": _pick(ordered, 95) * 1000,
+            "p99_ms": _pick(ordered, 99) * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
+
+
+class LatencyRegistry:
+    """Latency histograms per interval plus a bounded log of finished turns."""
+
+    def __init__(self, max_turns=1024):
+        self.histograms = {}
+        self.turns = deque(maxlen=max_turns)
+
+    def record_turn(self, turn):
+        for name, value in turn["intervals"].items():
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(value)
+        self.turns.append(turn)
+
+    def summary(self):
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def dump_jsonl(self, file):
+        """
+        Write the retained turns as JSON lines.
+        :param file: path or text file object
+        """
+        if isinstance(file, str):
+            with open(file, "a", encoding="utf-8") as f:
+                return self.dump_jsonl(f)
+        for turn in self.turns:
+            file.write(json.dumps(turn) + "\n")
+        return len(self.turns)
+
+
+# Shared by every session in this worker process
+process_latencies = LatencyRegistry()
+
+
+class TurnTimeline:
+    """
+    Monotonic timestamps for one user turn, from end of speech (or an explicit response.create)
+    through tool calls and follow-up responses to the final response.done.
+    """
+
+    def __init__(self, session_id=None, registry=process_latencies):
+        self.session_id = session_id
+        self.session = LatencyRegistry(max_turns=256)
+        self.registry = registry
+        self.points = None
+        self.turn = 0
+
+    def begin(self, point="start"):
+        self.turn += 1
+        now = time.monotonic()
+        self.points = {"start": now}
+        if point != "start":
+            self.points[point] = now
+
+    def stamp(self, point):
+        """Record the first occurrence of `point` in the current turn (opens a turn if none is active)."""
+        if self.points is None:
+            self.begin()
+        if point not in self.points:
+            self.points[point] = time.monotonic()
+
+    def stamp_audio(self):
+        """First audio byte of the turn, or of the follow-up response after a tool call."""
+        points = self.points
+        if points is None:
+            return
+        if "followup_create" in points:
+            if "followup_first_audio" not in points:
+                points["followup_first_audio"] = time.monotonic()
+        elif "first_audio" not in points:
+            points["first_audio"] = time.monotonic()
+
+    def finish(self):
+        if self.points is None:
+            return None
+        self.stamp("response_done")
+        points, self.points = self.points, None
+        start = points["start"]
+        turn = {
+            "session": self.session_id,
+            "turn": self.turn,
+            "points_ms": {name: (value - start) * 1000 for name, value in points.items()},
+            "intervals": {
+                name: points[end] - points[begin]
+                for name, begin, end in INTERVALS
+                # Points stamped out of the expected order say nothing about that stage
+                if begin in points and end in points and points[end] >= points[begin]
+            },
+        }
+        self.session.record_turn(turn)
+        if self.registry is not None:
+            self.registry.record_turn(turn)
+        return turn
+
+    def summary(self):
+        return self.session.summary()
@@ -63,7 +63,9 @@ show_whale_routes_def = {
             }
         },
         "required": ["region"]
-    }
+    },
+    "read_only": True,
+    "cache": {"ttl": 300, "max_entries": 64}
 }
 
 check_routes_def = {
@@ -83,7 +85,9 @@ check_routes_def = {
             }
         },
         "required": ["region"]
-    }
+    },
+    "read_only": True,
+    "cache": {"ttl": 60, "max_entries": 64}
 }
 
 send_notification_def = {
@@ -140,6 +144,17 @@ create_ticket_def = {
     }
 }
 
+WHALE_ROUTE_IMAGES = {
+    "Gulf of St. Lawrence": "data/whale_routes_gulf_of_st_lawrence.png",
+}
+
+
+def whale_routes_header(region, season):
+    return f"""
+## Whale Protection Measures - {region}
+### Season: {season}
+"""
+
 async def show_whale_routes_handler(region, season="current"):
     try:
         # Configuration
@@ -151,7 +166,6 @@ async def show_whale_routes_handler(region, season="current"):
         # Simulated whale protection zones and speed restrictions
         whale_zones = {
             "Gulf of St. Lawrence": {
-                "image_path": "data/whale_routes_gulf_of_st_lawrence.png",
                 "static_zones": {
                     "description": "Mandatory Static Zones",
                     "speed_limit": "≤10 knots",
@@ -231,10 +245,7 @@ async def show_whale_routes_handler(region, season="current"):
             return result
 
         # Create header content
-        header_content = f"""
-## Whale Protection Measures - {region}
-### Season: {season}
-"""
+        header_content = whale_routes_header(region, season)
 
         # Create main content
         main_content = ""
@@ -307,27 +318,7 @@ async def show_whale_routes_handler(region, season="current"):
 >
 > ⏱️ **Last Updated:** {(datetime.now() - timedelta(minutes=15)).strftime("%d-%m-%y %I:%M %p")}"""
 
-        # Create elements list for the image
-        elements = []
-        if "image_path" in whale_zones[region]:
-            elements.append(
-                cl.Image(
-                    name=f"whale_routes_{region.lower().replace(' ', '_')}", 
-                    path=whale_zones[region]["image_path"],
-                    display="inline"
-                )
-            )
-
-        # Send message with header, image, and main content in the desired order
-        await cl.Message(
-            content=header_content,
-            elements=elements
-        ).send()
-        
-        # Send the main content as a separate message
-        await cl.Message(content=main_content).send()
-        
-        # Return both status and full details
+        # Return both status and full details; show_whale_routes_render displays them
         result = {
             "status": f"Whale protection measures displayed for {region}",
             "details": header_content + main_content
@@ -339,6 +330,32 @@ async def show_whale_routes_handler(region, season="current"):
         log_tool_call("show_whale_routes", {"region": region, "season": season}, error_msg)
         raise
 
+async def show_whale_routes_render(result, region, season="current"):
+    if not isinstance(result, dict):
+        return
+    header_content = whale_routes_header(region, season)
+    main_content = result["details"][len(header_content):]
+
+    # Create elements list for the image
+    elements = []
+    if region in WHALE_ROUTE_IMAGES:
+        elements.append(
+            cl.Image(
+                name=f"whale_routes_{region.lower().replace(' ', '_')}",
+                path=WHALE_ROUTE_IMAGES[region],
+                display="inline"
+            )
+        )
+
+    # Send message with header, image, and main content in the desired order
+    await cl.Message(
+        content=header_content,
+        elements=elements
+    ).send()
+
+    # Send the main content as a separate message
+    await cl.Message(content=main_content).send()
+
 async def check_routes_handler(region, date_range="next 7 days"):
     try:
         # Use global cosmos_db instance instead of creating new one
@@ -404,10 +421,7 @@ async def check_routes_handler(region, date_range="next 7 days"):
 > ```
 > ⏱️ **Last Updated:** {(datetime.now() - timedelta(minutes=15)).strftime("%d-%m-%y %I:%M %p")}"""
 
-        # Send single message with complete table
-        await cl.Message(content=message_content).send()
-        
-        # Return both status and full details
+        # Return both status and full details; check_routes_render displays the table
         result = {
             "status": f"Vessel routes displayed for {region}",
             "details": message_content
@@ -419,6 +433,11 @@ async def check_routes_handler(region, date_range="next 7 days"):
         log_tool_call("check_routes", {"region": region, "date_range": date_range}, error_msg)
         raise
 
+async def check_routes_render(result, region, date_range="next 7 days"):
+    if isinstance(result, dict):
+        # Send single message with complete table
+        await cl.Message(content=result["details"]).send()
+
 async def send_notification_handler(vessel_ids, message, priority="medium"):
     try:
         timestamp = datetime.now().isoformat()
@@ -635,8 +654,8 @@ Total vessels affected: {len(vessel_imos)}
 
 # Tools list
 tools = [
-    (show_whale_routes_def, show_whale_routes_handler),
-    (check_routes_def, check_routes_handler),
+    (show_whale_routes_def, show_whale_routes_handler, show_whale_routes_render),
+    (check_routes_def, check_routes_handler, check_routes_render),
     (send_notification_def, send_notification_handler),
     (create_ticket_def, create_ticket_handler),
 ]
\ No newline at end of file
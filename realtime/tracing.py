@@ -0,0 +1,104 @@
+import logging
+
+
+# Streaming event types that arrive or leave many times per second; everything else is traced in full
+DEFAULT_SAMPLE_RATES = {
+    "input_audio_buffer.append": 0.01,
+    "response.audio.delta": 0.01,
+    "response.audio_transcript.delta": 0.1,
+    "response.text.delta": 0.1,
+    "response.function_call_arguments.delta": 0.1,
+}
+
+AUDIO_DELTA_TYPES = ("response.audio.delta",)
+
+
+def base64_size(value):
+    """Decoded size of a base64 string without decoding it."""
+    if not value:
+        return 0
+    return len(value) * 3 // 4 - value.count("=", -2)
+
+
+def redact_event(event):
+    """
+    Shallow copy of `event` with base64 audio replaced by its byte length.
+    Only the containers that hold audio are copied; the original event is never modified.
+    """
+    redacted = None
+    if isinstance(event.get("audio"), str):
+        redacted = dict(event)
+        redacted["audio"] = f"<{base64_size(event['audio'])} bytes>"
+    if event.get("type") in AUDIO_DELTA_TYPES and isinstance(event.get("delta"), str):
+        redacted = redacted or dict(event)
+        redacted["delta"] = f"<{base64_size(event['delta'])} bytes>"
+    item = event.get("item")
+    if isinstance(item, dict) and item.get("content"):
+        content = [
+            {**part, "audio": f"<{base64_size(part['audio'])} bytes>"} if isinstance(part.get("audio"), str) else part
+            for part in item["content"]
+        ]
+        if any(new is not old for new, old in zip(content, item["content"])):
+            redacted = redacted or dict(event)
+            redacted["item"] = {**item, "content": content}
+    return redacted or event
+
+
+class EventTracer:
+    """
+    Debug tracing of websocket events.
+    Nothing is formatted unless the logger is enabled for DEBUG; streaming event types are sampled
+    (every Nth event of that type) and audio payloads are logged as their byte length.
+    """
+
+    def __init__(self, logger, sample_rates=None, default_rate=1.0, level=logging.DEBUG):
+        self.logger = logger
+        self.level = level
+        self.default_rate = default_rate
+        self.sample_rates = dict(DEFAULT_SAMPLE_RATES)
+        self.sample_rates.update(sample_rates or {})
+        self.intervals = {}
+        self.counters = {}
+        self.skipped = 0
+
+    def enabled(self):
+        return self.logger.isEnabledFor(self.level)
+
+    def set_sample_rate(self, event_type, rate):
+        """:param rate: fraction of events of this type to trace, 0 disables it and 1 traces all of them"""
+        self.sample_rates[event_type] = rate
+        self.intervals.pop(event_type, None)
+
+    def _interval(self, event_type):
+        interval = self.intervals.get(event_type)
+        if interval is None:
+            rate = self.sample_rates.get(event_type, self.default_rate)
+            interval = 0 if rate <= 0 else max(1, round(1 / rate))
+            self.intervals[event_type] = interval
+        return interval
+
+    def sampled(self, event_type):
+        interval = self._interval(event_type)
+        if interval == 1:
+            return True
+        if interval == 0:
+            return False
+        count = self.counters.get(event_type, 0)
+        self.counters[event_type] = count + 1
+        return count % interval == 0
+
+    def trace(self, direction, event):
+        """
+        :param direction: "sent" or "received"
+        :param event: event dict; redacted before formatting, never modified
+        """
+        if not self.logger.isEnabledFor(self.level):
+            return
+        if not self.sampled(event.get("type")):
+            self.skipped += 1
+            return
+        self.logger.log(self.level, "[Websocket] %s: %s", direction, redact_event(event))
+
+    def message(self, message, *args):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "[Websocket] " + message, *args)
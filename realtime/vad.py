@@ -0,0 +1,111 @@
+import bisect
+from collections import deque
+import numpy as np
+
+
+MAX_OFFSET_RUNS = 1024
+
+
+class LocalVAD:
+    """
+    Client-side voice activity detection used to drop silent frames before they are uploaded.
+    Each frame is split into short windows and classified with vectorized energy and zero-crossing rate.
+    Speech onsets are preceded by up to prefix_padding_ms of pre-roll, and audio keeps flowing for
+    hangover_ms after the last voiced frame so the server VAD still sees the trailing silence it
+    needs to close the turn (keep hangover_ms above the server's silence_duration_ms).
+    """
+
+    def __init__(self, sample_rate, prefix_padding_ms=300, hangover_ms=500, threshold_db=-50.0,
+                 noise_margin_db=12.0, zcr_max=0.35, window_ms=10):
+        self.sample_rate = sample_rate
+        self.window = max(1, sample_rate * window_ms // 1000)
+        self.prefix_padding_bytes = sample_rate * prefix_padding_ms // 1000 * 2
+        self.hangover_bytes = sample_rate * hangover_ms // 1000 * 2
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.zcr_max = zcr_max
+        self.noise_floor_db = threshold_db - noise_margin_db
+        self.pre_roll = deque()
+        self.pre_roll_bytes = 0
+        self.hangover_left = 0
+        self.local_bytes = 0  # audio seen by the VAD
+        self.sent_bytes = 0  # audio passed through
+        self.suppressed_bytes = 0
+        self.suppressed_frames = 0
+        # (sent byte offset, local byte offset) at the start of every sent run, to map server offsets back
+        self.sent_offsets = [0]
+        self.local_offsets = [0]
+
+    def is_speech(self, frame):
+        samples = np.frombuffer(frame, dtype=np.int16)
+        count = len(samples) // self.window
+        if count == 0:
+            return False
+        windows = samples[:count * self.window].reshape(count, self.window).astype(np.float32)
+        energy = np.mean(windows * windows, axis=1)
+        db = 10 * np.log10(energy / (32768.0 * 32768.0) + 1e-12)
+        signs = np.signbit(windows)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.window
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        voiced = (db > threshold) & ((zcr < self.zcr_max) | (db > threshold + 10))
+        if not voiced.any():
+            # Slowly track the background level on frames without speech
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * float(np.median(db))
+            return False
+        return True
+
+    def process(self, frame):
+        """
+        Classify one frame.
+        :param frame: PCM16 bytes
+        :return: list of frames to upload (pre-roll first), empty while suppressing silence
+        """
+        size = len(frame)
+        start = self.local_bytes
+        self.local_bytes += size
+        speech = self.is_speech(frame)
+        if speech:
+            self.hangover_left = self.hangover_bytes
+        elif self.hangover_left > 0:
+            self.hangover_left -= size
+        else:
+            self.pre_roll.append(frame)
+            self.pre_roll_bytes += size
+            while self.pre_roll and self.pre_roll_bytes - len(self.pre_roll[0]) >= self.prefix_padding_bytes:
+                dropped = self.pre_roll.popleft()
+                self.pre_roll_bytes -= len(dropped)
+                self.suppressed_bytes += len(dropped)
+                self.suppressed_frames += 1
+            return []
+        frames = []
+        if self.pre_roll:
+            start -= self.pre_roll_bytes
+            frames.extend(self.pre_roll)
+            self.pre_roll.clear()
+            self.pre_roll_bytes = 0
+        if start != self.local_offsets[-1] + (self.sent_bytes - self.sent_offsets[-1]):
+            # A gap was suppressed before this run
+            self.sent_offsets.append(self.sent_bytes)
+            self.local_offsets.append(start)
+            if len(self.sent_offsets) > MAX_OFFSET_RUNS:
+                del self.sent_offsets[:-MAX_OFFSET_RUNS]
+                del self.local_offsets[:-MAX_OFFSET_RUNS]
+        frames.append(frame)
+        self.sent_bytes += sum(len(f) for f in frames)
+        return frames
+
+    def to_local_ms(self, sent_ms):
+        """Map a server-side audio offset (ms of uploaded audio) to the ms of local audio it came from."""
+        sent = sent_ms * self.sample_rate // 1000 * 2
+        i = max(0, bisect.bisect_right(self.sent_offsets, sent) - 1)
+        local = self.local_offsets[i] + (sent - self.sent_offsets[i])
+        return local * 1000 // (self.sample_rate * 2)
+
+    def stats(self):
+        return {
+            "sent_bytes": self.sent_bytes,
+            "suppressed_bytes": self.suppressed_bytes,
+            "suppressed_frames": self.suppressed_frames,
+            "pending_pre_roll_bytes": self.pre_roll_bytes,
+            "noise_floor_db": self.noise_floor_db,
+        }
@@ -0,0 +1,258 @@
+"""
+Throughput benchmark for the event processors: synthetic event streams go straight into
+RealtimeConversation.process_event and RealtimeClient._process_event, without a socket.
+
+Reports events/s (median of --repeat samples, each replaying the stream on fresh targets until at least
+--min-events were processed, with GC off), bytes allocated per event (tracemalloc: how far each event pushes
+traced memory above where it started, so temporaries count even when they are freed again), memory blocks
+still allocated per event once the stream is done (sys.getallocatedblocks), and the tracemalloc peak.
+The conversation journal is off in every measurement. Results are compared with the stored baselines;
+a slowdown or memory growth beyond --threshold fails the run. Baselines are machine specific: record them
+on the machine that runs the comparison.
+
+    python scripts/bench_process_event.py                   # compare with baselines
+    python scripts/bench_process_event.py --save-baselines  # after an intended change
+"""
+import argparse
+import base64
+import gc
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Add the parent directory to sys.path to import from parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime import RealtimeClient, RealtimeConversation
+from realtime.audio import PCM16Ring
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_process_event_baselines.json")
+SAMPLE_RATE = RealtimeConversation.default_frequency
+
+
+def audio_response(deltas, chunk_ms=50):
+    """One spoken assistant response: audio and transcript deltas interleaved, as the server sends them."""
+    audio = base64.b64encode(bytes(SAMPLE_RATE * chunk_ms // 1000 * 2)).decode("ascii")
+    ids = {"response_id": "resp_1", "item_id": "item_a", "output_index": 0, "content_index": 0}
+    events = [
+        {"type": "response.created", "response": {"id": "resp_1", "status": "in_progress", "output": []}},
+        {"type": "response.output_item.added", "response_id": "resp_1", "output_index": 0, "item": {"id": "item_a"}},
+        {"type": "conversation.item.created", "item": {
+            "id": "item_a", "type": "message", "role": "assistant", "status": "in_progress", "content": []}},
+        {"type": "response.content_part.added", "part": {"type": "audio", "transcript": ""}, **ids},
+    ]
+    for index in range(deltas):
+        events.append({"type": "response.audio.delta", "delta": audio, **ids})
+        events.append({"type": "response.audio_transcript.delta", "delta": f"word{index % 50} ", **ids})
+    events.append({"type": "response.output_item.done", "response_id": "resp_1", "output_index": 0, "item": {
+        "id": "item_a", "type": "message", "role": "assistant", "status": "completed",
+        "content": [{"type": "audio", "transcript": "..."}]}})
+    return events
+
+
+def function_call(deltas):
+    """A function call whose arguments arrive a few characters at a time."""
+    events = [
+        {"type": "response.created", "response": {"id": "resp_2", "status": "in_progress", "output": []}},
+        {"type": "conversation.item.created", "item": {
+            "id": "item_f", "type": "function_call", "status": "in_progress",
+            "name": "check_routes", "call_id": "call_1", "arguments": ""}},
+        {"type": "response.function_call_arguments.delta", "item_id": "item_f", "delta": '{"region": "'},
+    ]
+    for index in range(deltas):
+        events.append({"type": "response.function_call_arguments.delta", "item_id": "item_f", "delta": "Gulf "})
+    events.append({"type": "response.function_call_arguments.delta", "item_id": "item_f", "delta": '"}'})
+    events.append({"type": "response.output_item.done", "response_id": "resp_2", "output_index": 0, "item": {
+        "id": "item_f", "type": "function_call", "status": "completed"}})
+    return events
+
+
+def item_churn(items):
+    """User turns and assistant items being created, transcribed, truncated and deleted."""
+    audio = base64.b64encode(bytes(SAMPLE_RATE // 10 * 2)).decode("ascii")
+    events = []
+    for index in range(items):
+        user_id, assistant_id = f"item_u{index}", f"item_r{index}"
+        # Stay inside the few seconds of input audio the benchmark keeps
+        start_ms = (index % 4) * 1000
+        events += [
+            {"type": "input_audio_buffer.speech_started", "audio_start_ms": start_ms, "item_id": user_id},
+            {"type": "input_audio_buffer.speech_stopped", "audio_end_ms": start_ms + 800, "item_id": user_id},
+            {"type": "conversation.item.created", "item": {
+                "id": user_id, "type": "message", "role": "user", "status": "completed",
+                "content": [{"type": "input_audio", "transcript": None}]}},
+            {"type": "conversation.item.input_audio_transcription.completed",
+             "item_id": user_id, "content_index": 0, "transcript": "Show me the whale routes"},
+            {"type": "conversation.item.created", "item": {
+                "id": assistant_id, "type": "message", "role": "assistant", "status": "in_progress", "content": []}},
+            {"type": "response.audio.delta", "item_id": assistant_id, "content_index": 0, "delta": audio},
+            {"type": "conversation.item.truncated", "item_id": assistant_id, "content_index": 0, "audio_end_ms": 50},
+            {"type": "conversation.item.deleted", "item_id": user_id},
+            {"type": "conversation.item.deleted", "item_id": assistant_id},
+        ]
+    return events
+
+
+SCENARIOS = {
+    "audio_response": lambda size: audio_response(size),
+    "function_call": lambda size: function_call(size),
+    "item_churn": lambda size: item_churn(max(1, size // 10)),
+}
+
+
+class NullJournal:
+    """Stands in for the conversation journal while timing, so its writer thread does not compete."""
+
+    def record(self, action, item):
+        pass
+
+    def summary(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+def make_target(name):
+    """:return: (process(event), input buffer for speech_stopped, conversation)"""
+    input_audio = PCM16Ring(SAMPLE_RATE, 10000)
+    input_audio.append(bytes(SAMPLE_RATE * 2 * 5))
+    if name == "conversation":
+        conversation = RealtimeConversation()
+        return conversation.process_event, input_audio, conversation
+    client = RealtimeClient(system_prompt="bench", url="ws://127.0.0.1:0", input_sample_rate=SAMPLE_RATE)
+    return client._process_event, input_audio, client.conversation
+
+
+def run_once(target, events):
+    process, input_audio, conversation = make_target(target)
+    conversation.journal = NullJournal()
+    gc.collect()
+    gc.disable()
+    started = time.perf_counter()
+    for event in events:
+        if event["type"] == "input_audio_buffer.speech_stopped":
+            process(event, input_audio)
+        else:
+            process(event)
+    elapsed = time.perf_counter() - started
+    gc.enable()
+    return elapsed
+
+
+def sample(target, events, min_events):
+    """:return: events/s over enough fresh replays of the stream to process at least min_events"""
+    loops = max(1, -(-min_events // len(events)))
+    elapsed = sum(run_once(target, events) for _ in range(loops))
+    return loops * len(events) / elapsed
+
+
+def measure_memory(target, events):
+    """:return: (bytes allocated per event, blocks retained per event, peak traced bytes)"""
+    process, input_audio, conversation = make_target(target)
+    conversation.journal = NullJournal()
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    allocated = 0
+    peak = 0
+    for event in events:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        if event["type"] == "input_audio_buffer.speech_stopped":
+            process(event, input_audio)
+        else:
+            process(event)
+        event_peak = tracemalloc.get_traced_memory()[1]
+        allocated += event_peak - before
+        peak = max(peak, event_peak)
+    tracemalloc.stop()
+    gc.collect()
+    return allocated / len(events), (sys.getallocatedblocks() - blocks) / len(events), peak
+
+
+def run(args):
+    results = {}
+    for scenario in args.scenarios:
+        events = SCENARIOS[scenario](args.size)
+        for target in args.targets:
+            rate = statistics.median(sample(target, events, args.min_events) for _ in range(args.repeat))
+            allocated, retained_blocks, peak = measure_memory(target, events)
+            results[f"{scenario}/{target}"] = {
+                "events": len(events),
+                "events_per_s": round(rate),
+                "alloc_bytes_per_event": round(allocated, 1),
+                "retained_blocks_per_event": round(retained_blocks, 3),
+                "peak_kb": round(peak / 1024, 1),
+            }
+    return results
+
+
+def compare(results, baselines, threshold):
+    """:return: list of regression messages"""
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            continue
+        if result["events_per_s"] < baseline["events_per_s"] * (1 - threshold):
+            regressions.append(f"{name}: {result['events_per_s']} events/s, baseline {baseline['events_per_s']}")
+        if result["peak_kb"] > baseline["peak_kb"] * (1 + threshold) + 64:
+            regressions.append(f"{name}: peak {result['peak_kb']} KB, baseline {baseline['peak_kb']} KB")
+        allocated = baseline.get("alloc_bytes_per_event")
+        if allocated is not None and result["alloc_bytes_per_event"] > allocated * (1 + threshold) + 64:
+            regressions.append(f"{name}: {result['alloc_bytes_per_event']} bytes allocated/event, baseline {allocated}")
+        retained = baseline.get("retained_blocks_per_event")
+        if retained is not None and result["retained_blocks_per_event"] > retained * (1 + threshold) + 0.5:
+            regressions.append(f"{name}: {result['retained_blocks_per_event']} retained blocks/event, baseline {retained}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RealtimeConversation / RealtimeClient event processing")
+    parser.add_argument("--size", type=int, default=5000, help="Deltas per streamed item")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per benchmark; the median is reported")
+    parser.add_argument("--min-events", type=int, default=100000, help="Events processed per sample")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--targets", nargs="*", default=["conversation", "client"], choices=["conversation", "client"])
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed relative regression")
+    parser.add_argument("--save-baselines", action="store_true")
+    args = parser.parse_args()
+    # The conversation journal logs every item; keep it out of the measurement output
+    logging.getLogger("realtime").setLevel(logging.WARNING)
+
+    results = run(args)
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    print(f"{'benchmark':<28} {'events':>7} {'events/s':>10} {'baseline':>10} {'alloc B/ev':>11} {'retained/ev':>12} {'peak KB':>9}")
+    for name, result in results.items():
+        baseline = baselines.get(name, {}).get("events_per_s", "-")
+        print(f"{name:<28} {result['events']:>7} {result['events_per_s']:>10} {baseline:>10} "
+              f"{result['alloc_bytes_per_event']:>11} {result['retained_blocks_per_event']:>12} {result['peak_kb']:>9}")
+
+    if args.save_baselines:
+        baselines.update(results)
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baselines to {args.baselines}")
+        return
+
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compare per-delta string concatenation with the chunked TextBuilder used by ConversationItem."""
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to sys.path to import from parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime.store import ConversationItem
+
+
+def concat_deltas(deltas):
+    """What the conversation used to do: two dict-held strings grown with += per delta."""
+    item = {'content': [{'type': 'audio', 'transcript': ''}], 'formatted': {'transcript': ''}}
+    for delta in deltas:
+        item['content'][0]['transcript'] += delta
+        item['formatted']['transcript'] += delta
+    return item['formatted']['transcript']
+
+
+def builder_deltas(deltas):
+    item = ConversationItem({'id': 'item_bench', 'type': 'message', 'role': 'assistant', 'content': []})
+    for delta in deltas:
+        item.append_transcript(delta)
+    return item.transcript
+
+
+def best_of(fn, deltas, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(deltas)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript/argument delta accumulation")
+    parser.add_argument('--counts', type=int, nargs='*', default=[1000, 5000, 20000, 50000])
+    parser.add_argument('--delta', type=str, default='whale ', help="Text of each delta")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'deltas':>8} {'concat ms':>10} {'builder ms':>11} {'speedup':>8}")
+    for count in args.counts:
+        deltas = [args.delta] * count
+        assert concat_deltas(deltas) == builder_deltas(deltas)
+        concat = best_of(concat_deltas, deltas, args.repeat)
+        builder = best_of(builder_deltas, deltas, args.repeat)
+        print(f"{count:>8} {concat * 1000:>10.2f} {builder * 1000:>11.2f} {concat / builder:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Drive N concurrent RealtimeClient sessions from WAV files against a Realtime endpoint
+(normally scripts/mock_realtime_server.py) and report throughput, turn latency, event-loop lag and RSS.
+
+    python scripts/mock_realtime_server.py &
+    python scripts/load_realtime.py --url ws://127.0.0.1:8765 --sessions 50 --turns 3 --wav data/question.wav
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+# Add the parent directory to sys.path to import from parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime import RealtimeClient
+from realtime.convert import MODEL_SAMPLE_RATE
+from realtime.timing import LatencyHistogram, LatencyRegistry
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss is a peak, not the current size, but better than nothing off Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def load_wav(path):
+    """:return: (pcm16 bytes, sample rate, channels)"""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise Exception(f"{path}: only 16-bit WAV files are supported")
+        return f.readframes(f.getnframes()), f.getframerate(), f.getnchannels()
+
+
+def synthetic_speech(duration_ms=1500):
+    """Noise burst loud enough for the mock server's VAD, used when no WAV file is given."""
+    samples = MODEL_SAMPLE_RATE * duration_ms // 1000
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(samples) * 0.2 * 32767).clip(-32768, 32767).astype(np.int16).tobytes(), MODEL_SAMPLE_RATE, 1
+
+
+async def mock_tool(**kwargs):
+    await asyncio.sleep(0.05)
+    return {"status": "ok"}
+
+
+MOCK_TOOL = {
+    "name": "check_routes",
+    "description": "Mock of check_routes for load tests",
+    "parameters": {"type": "object", "properties": {"region": {"type": "string"}}, "required": ["region"]},
+    "read_only": True,
+}
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires; a busy loop delays every session at once."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.histogram = LatencyHistogram(max_samples=100000)
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.histogram.add(max(0.0, loop.time() - started - self.interval))
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+
+class Session:
+    def __init__(self, index, options, audio, registry):
+        pcm, rate, channels = audio
+        self.index = index
+        self.options = options
+        self.pcm = pcm
+        self.frame_bytes = rate * channels * 2 * options.frame_ms // 1000
+        self.silence = bytes(self.frame_bytes)
+        self.client = RealtimeClient(
+            system_prompt="Load test", url=options.url, input_sample_rate=rate, input_channels=channels,
+        )
+        self.client.timing.registry = registry
+        self.turn_done = asyncio.Event()
+        self.events = 0
+        self.turns = 0
+        self.errors = 0
+        self.client.realtime.on("server.*", self._count)
+        self.client.realtime.on("server.response.done", self._on_response_done)
+
+    def _count(self, event):
+        self.events += 1
+        if event["type"] == "error":
+            self.errors += 1
+
+    def _on_response_done(self, event):
+        output = event["response"].get("output") or []
+        if not any(item.get("type") == "function_call" for item in output):
+            self.turn_done.set()
+
+    async def _stream(self, pcm):
+        frame_seconds = self.options.frame_ms / 1000
+        for start in range(0, len(pcm), self.frame_bytes):
+            await self.client.append_input_audio(pcm[start:start + self.frame_bytes])
+            if self.options.realtime_input:
+                await asyncio.sleep(frame_seconds)
+
+    async def run(self):
+        await self.client.add_tool(MOCK_TOOL, mock_tool)
+        await self.client.connect()
+        await self.client.wait_for_session_created(self.options.timeout)
+        for _ in range(self.options.turns):
+            self.turn_done.clear()
+            await self._stream(self.pcm)
+            # Trailing silence so the server's VAD closes the turn
+            silence_frames = self.options.trailing_silence_ms // self.options.frame_ms
+            await self._stream(self.silence * silence_frames)
+            try:
+                await asyncio.wait_for(self.turn_done.wait(), self.options.timeout)
+                self.turns += 1
+            except asyncio.TimeoutError:
+                self.errors += 1
+        await self.client.disconnect()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent RealtimeClient load generator")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765", help="Websocket URL of the (mock) Realtime API")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3, help="Spoken turns per session")
+    parser.add_argument("--wav", nargs="*", default=[], help="16-bit WAV files, assigned to sessions round robin")
+    parser.add_argument("--frame-ms", type=int, default=20, help="Microphone chunk size")
+    parser.add_argument("--trailing-silence-ms", type=int, default=800)
+    parser.add_argument("--no-realtime-input", dest="realtime_input", action="store_false",
+                        help="Send microphone audio as fast as possible instead of in real time")
+    parser.add_argument("--ramp-ms", type=int, default=20, help="Delay between session starts")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--with-server", action="store_true", help="Run the mock server in this process")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args()
+
+
+async def main():
+    options = parse_args()
+    # Per-event conversation journal and connection logs would dominate the run
+    logging.getLogger("realtime").setLevel(logging.WARNING)
+    logging.getLogger("websockets").setLevel(logging.WARNING)
+    server = None
+    if options.with_server:
+        from mock_realtime_server import parse_args as server_args, serve
+        host, port = options.url.rsplit("/", 1)[-1].split(":")
+        server = await serve(server_args(["--host", host, "--port", port]))
+
+    audio = [load_wav(path) for path in options.wav] or [synthetic_speech()]
+    registry = LatencyRegistry(max_turns=options.sessions * options.turns)
+    monitor = LoopLagMonitor()
+    rss_before = rss_bytes()
+    sessions = [Session(i, options, audio[i % len(audio)], registry) for i in range(options.sessions)]
+
+    monitor.start()
+    started = time.monotonic()
+
+    async def run(session):
+        await asyncio.sleep(session.index * options.ramp_ms / 1000)
+        try:
+            await session.run()
+        except Exception as e:
+            session.errors += 1
+            print(f"session {session.index}: {e!r}", file=sys.stderr)
+
+    runner = asyncio.gather(*(run(session) for session in sessions))
+    # Sample RSS while every session is connected
+    rss_peak = rss_before
+    while not runner.done():
+        rss_peak = max(rss_peak, rss_bytes())
+        await asyncio.sleep(0.2)
+    await runner
+    elapsed = time.monotonic() - started
+    monitor.stop()
+    if server:
+        server.close()
+
+    turns = sum(session.turns for session in sessions)
+    events = sum(session.events for session in sessions)
+    latencies = registry.summary()
+    report = {
+        "sessions": options.sessions,
+        "elapsed_s": round(elapsed, 2),
+        "turns": turns,
+        "errors": sum(session.errors for session in sessions),
+        "turns_per_s": round(turns / elapsed, 2),
+        "server_events_per_s": round(events / elapsed, 1),
+        "loop_lag_ms": monitor.histogram.summary(),
+        "rss_per_session_kb": round((rss_peak - rss_before) / options.sessions / 1024, 1),
+        "rss_peak_mb": round(rss_peak / 2**20, 1),
+        # Turn and per-stage latencies as seen by the clients (turns with a tool call report followup_*)
+        **{f"{name}_ms": summary for name, summary in latencies.items()},
+    }
+    if options.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in value.items())
+        print(f"{key:>26}: {value}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,255 @@
+"""
+Local stand-in for the Realtime API websocket, for load tests that should not spend quota.
+
+Speaks the subset of the event protocol the client uses: session.created/updated, server VAD
+(speech_started/stopped, committed, transcription), audio responses streamed as response.audio.delta
+at a configurable pace, function calls, cancel, truncate and delete.
+
+    python scripts/mock_realtime_server.py --port 8765
+    REALTIME_API_URL=ws://127.0.0.1:8765 chainlit run app.py
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import math
+
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 24000
+_ids = itertools.count(1)
+
+
+def new_id(prefix):
+    return f"{prefix}{next(_ids)}"
+
+
+def tone(duration_ms, frequency=220.0, amplitude=0.2):
+    t = np.arange(SAMPLE_RATE * duration_ms // 1000) / SAMPLE_RATE
+    return (np.sin(2 * math.pi * frequency * t) * amplitude * 32767).astype(np.int16).tobytes()
+
+
+class MockSession:
+    def __init__(self, ws, options):
+        self.ws = ws
+        self.options = options
+        self.session = {
+            "id": new_id("sess_"),
+            "object": "realtime.session",
+            "turn_detection": {"type": "server_vad", "threshold": 0.5, "silence_duration_ms": 500},
+            "tools": [],
+        }
+        self.responses = 0
+        self.response_task = None
+        self.buffer_ms = 0
+        self.speech_item = None
+        self.speech_start_ms = 0
+        self.silence_ms = 0
+        self.audio_chunk = tone(options.chunk_ms)
+        # Conversation order, so item.created reports the real previous_item_id
+        self.item_ids = []
+
+    async def send(self, event_type, **fields):
+        await self.ws.send(json.dumps({"event_id": new_id("event_"), "type": event_type, **fields}))
+
+    async def item_created(self, item, after=None):
+        """Add an item after `after` ("root", an item id, or None for the end) and send conversation.item.created."""
+        if after == "root":
+            previous, index = None, 0
+        elif after in self.item_ids:
+            previous, index = after, self.item_ids.index(after) + 1
+        else:
+            previous, index = (self.item_ids[-1] if self.item_ids else None), len(self.item_ids)
+        self.item_ids.insert(index, item["id"])
+        await self.send("conversation.item.created", previous_item_id=previous, item=item)
+
+    async def run(self):
+        await self.send("session.created", session=self.session)
+        async for message in self.ws:
+            event = json.loads(message)
+            handler = getattr(self, "on_" + event["type"].replace(".", "_"), None)
+            if handler is None:
+                await self.send("error", error={"type": "invalid_request_error", "message": f"Unsupported event {event['type']}"})
+            else:
+                await handler(event)
+        if self.response_task:
+            self.response_task.cancel()
+
+    async def on_session_update(self, event):
+        self.session.update(event.get("session", {}))
+        await self.send("session.updated", session=self.session)
+
+    def vad_enabled(self):
+        return (self.session.get("turn_detection") or {}).get("type") == "server_vad"
+
+    async def on_input_audio_buffer_append(self, event):
+        samples = np.frombuffer(base64.b64decode(event["audio"]), dtype=np.int16)
+        duration_ms = len(samples) * 1000 // SAMPLE_RATE
+        start_ms = self.buffer_ms
+        self.buffer_ms += duration_ms
+        if not self.vad_enabled() or not len(samples):
+            return
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2))) / 32768
+        speaking = rms >= self.options.vad_rms
+        if self.speech_item is None:
+            if speaking:
+                self.speech_item = new_id("item_")
+                self.speech_start_ms = start_ms
+                self.silence_ms = 0
+                await self.send("input_audio_buffer.speech_started", audio_start_ms=start_ms, item_id=self.speech_item)
+            return
+        self.silence_ms = 0 if speaking else self.silence_ms + duration_ms
+        silence_duration = (self.session.get("turn_detection") or {}).get("silence_duration_ms", 500)
+        if self.silence_ms >= silence_duration:
+            item_id, self.speech_item = self.speech_item, None
+            await self.send("input_audio_buffer.speech_stopped", audio_end_ms=self.buffer_ms - self.silence_ms, item_id=item_id)
+            await self.commit(item_id)
+            self.start_response()
+
+    async def on_input_audio_buffer_commit(self, event):
+        await self.commit(new_id("item_"))
+
+    async def on_input_audio_buffer_clear(self, event):
+        self.speech_item = None
+        await self.send("input_audio_buffer.cleared")
+
+    async def commit(self, item_id):
+        previous = self.item_ids[-1] if self.item_ids else None
+        await self.send("input_audio_buffer.committed", previous_item_id=previous, item_id=item_id)
+        item = {
+            "id": item_id, "object": "realtime.item", "type": "message", "status": "completed", "role": "user",
+            "content": [{"type": "input_audio", "transcript": None}],
+        }
+        await self.item_created(item)
+        await self.send(
+            "conversation.item.input_audio_transcription.completed",
+            item_id=item_id, content_index=0, transcript="Check the whale routes in the Gulf of St. Lawrence.",
+        )
+
+    async def on_conversation_item_create(self, event):
+        item = {"id": new_id("item_"), "object": "realtime.item", "status": "completed", **event["item"]}
+        await self.item_created(item, event.get("previous_item_id"))
+
+    async def on_conversation_item_delete(self, event):
+        if event["item_id"] in self.item_ids:
+            self.item_ids.remove(event["item_id"])
+        await self.send("conversation.item.deleted", item_id=event["item_id"])
+
+    async def on_conversation_item_truncate(self, event):
+        await self.send(
+            "conversation.item.truncated",
+            item_id=event["item_id"], content_index=event["content_index"], audio_end_ms=event["audio_end_ms"],
+        )
+
+    async def on_response_create(self, event):
+        self.start_response()
+
+    async def on_response_cancel(self, event):
+        if self.response_task and not self.response_task.done():
+            self.response_task.cancel()
+
+    def start_response(self):
+        if self.response_task and not self.response_task.done():
+            self.response_task.cancel()
+        self.responses += 1
+        use_tool = self.session["tools"] and self.options.tool_every and self.responses % self.options.tool_every == 1
+        self.response_task = asyncio.create_task(self.function_call_response() if use_tool else self.audio_response())
+
+    async def response_done(self, response, status, output):
+        response.update(status=status, output=output)
+        await self.send("response.done", response=response)
+
+    async def function_call_response(self):
+        response = {"id": new_id("resp_"), "object": "realtime.response", "status": "in_progress", "output": []}
+        await self.send("response.created", response=response)
+        await asyncio.sleep(self.options.first_delta_ms / 1000)
+        tool = self.session["tools"][0]
+        properties = tool.get("parameters", {}).get("properties", {})
+        required = tool.get("parameters", {}).get("required", [])
+        arguments = json.dumps({name: "Gulf of St. Lawrence" if name == "region" else "test" for name in required if name in properties})
+        item = {
+            "id": new_id("item_"), "object": "realtime.item", "type": "function_call", "status": "in_progress",
+            "name": tool["name"], "call_id": new_id("call_"), "arguments": "",
+        }
+        try:
+            await self.send("response.output_item.added", response_id=response["id"], output_index=0, item=item)
+            await self.item_created(item)
+            for start in range(0, len(arguments), 8):
+                await self.send(
+                    "response.function_call_arguments.delta", response_id=response["id"], item_id=item["id"],
+                    output_index=0, call_id=item["call_id"], delta=arguments[start:start + 8],
+                )
+            await self.send(
+                "response.function_call_arguments.done", response_id=response["id"], item_id=item["id"],
+                output_index=0, call_id=item["call_id"], arguments=arguments,
+            )
+            item = {**item, "status": "completed", "arguments": arguments}
+            await self.send("response.output_item.done", response_id=response["id"], output_index=0, item=item)
+            await self.response_done(response, "completed", [item])
+        except asyncio.CancelledError:
+            await self.response_done(response, "cancelled", [item])
+
+    async def audio_response(self):
+        response = {"id": new_id("resp_"), "object": "realtime.response", "status": "in_progress", "output": []}
+        await self.send("response.created", response=response)
+        item = {
+            "id": new_id("item_"), "object": "realtime.item", "type": "message", "status": "in_progress",
+            "role": "assistant", "content": [],
+        }
+        ids = {"response_id": response["id"], "item_id": item["id"], "output_index": 0, "content_index": 0}
+        words = "Here are the whale protection measures for the region you asked about.".split()
+        try:
+            await self.send("response.output_item.added", response_id=response["id"], output_index=0, item=item)
+            await self.item_created(item)
+            await self.send("response.content_part.added", part={"type": "audio", "transcript": ""}, **ids)
+            await asyncio.sleep(self.options.first_delta_ms / 1000)
+            chunks = max(1, self.options.audio_ms // self.options.chunk_ms)
+            delta = base64.b64encode(self.audio_chunk).decode("ascii")
+            pace = self.options.chunk_ms / 1000 / self.options.speed if self.options.speed > 0 else 0
+            for index in range(chunks):
+                if index < len(words):
+                    await self.send("response.audio_transcript.delta", delta=words[index] + " ", **ids)
+                await self.send("response.audio.delta", delta=delta, **ids)
+                await asyncio.sleep(pace)
+            transcript = " ".join(words[:chunks]) + " "
+            await self.send("response.audio.done", **ids)
+            await self.send("response.audio_transcript.done", transcript=transcript, **ids)
+            part = {"type": "audio", "transcript": transcript}
+            await self.send("response.content_part.done", part=part, **ids)
+            item = {**item, "status": "completed", "content": [part]}
+            await self.send("response.output_item.done", response_id=response["id"], output_index=0, item=item)
+            await self.response_done(response, "completed", [item])
+        except asyncio.CancelledError:
+            await self.response_done(response, "cancelled", [{**item, "status": "incomplete"}])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Realtime API websocket server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--audio-ms", type=int, default=2000, help="Length of each spoken response")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Audio per response.audio.delta")
+    parser.add_argument("--speed", type=float, default=1.0, help="Delta pacing relative to real time, 0 sends as fast as possible")
+    parser.add_argument("--first-delta-ms", type=int, default=300, help="Simulated model latency before the first delta")
+    parser.add_argument("--tool-every", type=int, default=2, help="Every Nth response calls the first tool, 0 never")
+    parser.add_argument("--vad-rms", type=float, default=0.02, help="RMS level (0-1) treated as speech")
+    return parser.parse_args(argv)
+
+
+async def serve(options):
+    async def handler(ws, *args):
+        await MockSession(ws, options).run()
+    return await websockets.serve(handler, options.host, options.port, max_size=None)
+
+
+async def main():
+    options = parse_args()
+    server = await serve(options)
+    print(f"Mock realtime server on ws://{options.host}:{options.port}")
+    await server.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
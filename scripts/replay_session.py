@@ -0,0 +1,51 @@
+"""
+Replay a recorded realtime session (REALTIME_RECORD_DIR or RealtimeAPI.start_recording) through RealtimeClient.
+
+    python scripts/replay_session.py recordings/session_123.rtrec --speed 0
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+# Add the parent directory to sys.path to import from parent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime.recording import CLIENT, read_recording
+from realtime.replay import replay
+
+
+def describe(path):
+    counts = {}
+    duration = 0.0
+    for direction, timestamp, event in read_recording(path):
+        key = ("client" if direction == CLIENT else "server", event["type"])
+        counts[key] = counts.get(key, 0) + 1
+        duration = timestamp
+    return duration, counts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded realtime session")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = original pacing, 0 = as fast as possible")
+    parser.add_argument("--repeat", type=int, default=1, help="Replays to run, e.g. to benchmark with --speed 0")
+    parser.add_argument("--list", action="store_true", help="Only list the recorded events")
+    args = parser.parse_args()
+    logging.getLogger("realtime").setLevel(logging.WARNING)
+
+    duration, counts = describe(args.recording)
+    if args.list:
+        print(f"Recorded {duration:.2f}s")
+        for (direction, event_type), count in sorted(counts.items()):
+            print(f"{direction:>6} {event_type:<56} {count:>6}")
+        return
+    for _ in range(args.repeat):
+        result = await replay(args.recording, speed=args.speed)
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from mock_realtime_server import parse_args, serve
+from realtime import RealtimeClient, RealtimeConversation
+from realtime.compaction import CompactionPolicy
+
+
+def test_repeated_compaction_keeps_one_summary_and_the_newest_turns():
+    async def main():
+        server = await serve(parse_args([
+            "--port", "0", "--audio-ms", "200", "--speed", "0", "--first-delta-ms", "0", "--tool-every", "0",
+        ]))
+        port = server.sockets[0].getsockname()[1]
+        client = RealtimeClient(
+            system_prompt="test", url=f"ws://127.0.0.1:{port}",
+            compaction_policy=CompactionPolicy(max_items=6, keep_recent_items=3, keep_recent_tool_results=1),
+        )
+        await client.connect()
+        await client.wait_for_session_created(5)
+        turns = 8
+        for turn in range(turns):
+            response_done = asyncio.create_task(client.realtime.wait_for_next("server.response.done", 5))
+            await client.send_user_message_content([{"type": "input_text", "text": f"question {turn}"}])
+            await response_done
+            # Compaction runs in the response.done handler; wait for it and for the server's echoes
+            await client.realtime.join_dispatch_queues()
+            await asyncio.sleep(0.05)
+
+        items = list(client.conversation.get_items())
+        summaries = [item for item in items if CompactionPolicy.is_summary(item)]
+        assert len(summaries) == 1
+        assert items[0] is summaries[0]
+        assert len(items) <= 6
+        questions = [item.text for item in items if item.role == "user"]
+        assert questions[-1] == f"question {turns - 1}"
+        assert "question 0" in summaries[0].text
+        await client.disconnect()
+        server.close()
+
+    asyncio.run(main())
+
+
+def test_snapshot_tool_note_keeps_the_status_not_the_output():
+    conversation = RealtimeConversation()
+    conversation.process_event({"type": "conversation.item.created", "item": {
+        "id": "call", "type": "function_call", "call_id": "c1", "name": "search",
+        "arguments": '{"query": "invoices"}', "status": "completed",
+    }})
+    conversation.process_event({"type": "conversation.item.created", "item": {
+        "id": "result", "type": "function_call_output", "call_id": "c1",
+        "output": '{"status": "ok", "rows": ["' + "x" * 5000 + '"]}',
+    }})
+    [note] = conversation.snapshot()
+    assert note["content"][0]["text"] == "Tool search was called and returned: ok"
@@ -0,0 +1,126 @@
+import asyncio
+import contextvars
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime import RealtimeAPI, RealtimeClient
+from realtime.pool import RealtimeConnectionPool
+
+chat_session = contextvars.ContextVar("chat_session", default=None)
+
+
+class FakeSocket:
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    async def close(self):
+        pass
+
+
+class FakeRealtimeAPI(RealtimeAPI):
+    def __init__(self):
+        super().__init__(url="ws://fake")
+
+    async def connect(self):
+        self.ws = FakeSocket()
+        self.send_queue = asyncio.Queue(maxsize=self.send_queue_size)
+        self.writer = asyncio.create_task(self._send_messages())
+        self.receiver = asyncio.create_task(self._receive_messages())
+
+
+def test_handlers_run_in_attaching_session_context_after_pool_hit():
+    async def main():
+        pool = RealtimeConnectionPool(size=1, api_factory=FakeRealtimeAPI)
+        seen = asyncio.Queue()
+
+        async def session_a():
+            chat_session.set("A")
+            pool.start()
+            await pool.filling
+
+        async def session_b():
+            chat_session.set("B")
+            client = RealtimeClient(system_prompt="test", url="ws://fake")
+
+            await pool.attach(client)
+
+            async def handler(event):
+                await seen.put(chat_session.get())
+
+            client.realtime.on("server.test.event", handler)
+            return client
+
+        await asyncio.create_task(session_a())
+        client = await asyncio.create_task(session_b())
+        assert pool.hits == 1
+        await client.realtime.ws.incoming.put(json.dumps({"type": "test.event"}))
+        assert await asyncio.wait_for(seen.get(), 1) == "B"
+        await pool.detach(client)
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def test_attach_skips_session_update_when_warmed_with_the_same_config():
+    async def main():
+        client = RealtimeClient(system_prompt="test", url="ws://fake")
+        pool = RealtimeConnectionPool(size=1, session=client.session_payload(), api_factory=FakeRealtimeAPI)
+        pool.start()
+        await pool.filling
+        await pool.attach(client)
+        await asyncio.sleep(0)
+        sent = [event["type"] for event in client.realtime.ws.sent]
+        assert sent == ["session.update"]
+        await client.update_session(voice="echo")
+        await asyncio.sleep(0)
+        assert [event["type"] for event in client.realtime.ws.sent] == ["session.update", "session.update"]
+        await pool.detach(client)
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def test_maintenance_closes_aged_warm_connections():
+    async def main():
+        pool = RealtimeConnectionPool(size=1, max_age=0.05, maintain_interval=0.1, api_factory=FakeRealtimeAPI)
+        pool.start()
+        await pool.filling
+        _, first = pool.warm[0]
+        await asyncio.sleep(0.25)
+        assert not first.is_connected()
+        assert len(pool.warm) == 1 and pool.warm[0][1] is not first
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def test_attach_tags_timing_with_the_warmed_session_id():
+    async def main():
+        pool = RealtimeConnectionPool(size=1, api_factory=FakeRealtimeAPI)
+        pool.start()
+        await pool.filling
+        _, warmed = pool.warm[0]
+        await warmed.ws.incoming.put(json.dumps({"type": "session.created", "session": {"id": "sess_warm"}}))
+        while warmed.session is None:
+            await asyncio.sleep(0)
+        client = RealtimeClient(system_prompt="test", url="ws://fake")
+        await pool.attach(client)
+        assert client.session_created
+        assert client.timing.session_id == "sess_warm"
+        await pool.detach(client)
+        await pool.close()
+
+    asyncio.run(main())